@@ -0,0 +1,202 @@
+import argparse
+import time
+from operator import add
+
+import numpy as np
+
+from heatmap import decodeRangeDoppler
+from rawcapture import RawCapture, ReplayPort
+from recording import RecordingWriter
+from ringbuffer import RingBuffer
+
+# Micro-benchmarks for the acquisition hot path. Run from src/, e.g.
+#   python bench.py ringbuffer
+#   python bench.py replay 20240202_185342.uart
+
+
+# Legacy byteBuffer handling of readAndParseData16xx: append, then shift the
+# tail to the front and zero-fill the rest after each processed packet
+def _shiftAndZero(chunks, packetLen, bufferSize):
+    byteBuffer = np.zeros(bufferSize, dtype="uint8")
+    byteBufferLength = 0
+    for chunk in chunks:
+        byteVec = np.frombuffer(chunk, dtype="uint8")
+        byteCount = len(byteVec)
+        if (byteBufferLength + byteCount) < bufferSize:
+            byteBuffer[byteBufferLength : byteBufferLength + byteCount] = byteVec
+            byteBufferLength += byteCount
+        while byteBufferLength >= packetLen:
+            byteBuffer[: byteBufferLength - packetLen] = byteBuffer[
+                packetLen:byteBufferLength
+            ]
+            byteBuffer[byteBufferLength - packetLen :] = np.zeros(
+                len(byteBuffer[byteBufferLength - packetLen :]), dtype="uint8"
+            )
+            byteBufferLength -= packetLen
+
+
+def _ring(chunks, packetLen, bufferSize):
+    byteBuffer = RingBuffer(bufferSize)
+    for chunk in chunks:
+        byteBuffer.write(chunk)
+        while len(byteBuffer) >= packetLen:
+            byteBuffer.peek(packetLen)
+            byteBuffer.consume(packetLen)
+
+
+def _timeit(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchRingBuffer(args):
+    rng = np.random.default_rng(0)
+    stream = rng.integers(0, 256, args.packet_len * args.frames, dtype="uint8")
+    stream = stream.tobytes()
+    # Reads of uneven size, roughly one per frame like the 30 fps main loop
+    chunks = []
+    pos = 0
+    while pos < len(stream):
+        size = int(rng.integers(args.packet_len // 2, args.packet_len * 3 // 2))
+        chunks.append(stream[pos : pos + size])
+        pos += size
+
+    legacy = _timeit(_shiftAndZero, chunks, args.packet_len, args.buffer_size)
+    ring = _timeit(_ring, chunks, args.packet_len, args.buffer_size)
+    print(f"{args.frames} frames of {args.packet_len} B, {args.buffer_size} B buffer")
+    print(f"shift-and-zero: {legacy / args.frames * 1e6:8.2f} us/frame")
+    print(f"ring buffer:    {ring / args.frames * 1e6:8.2f} us/frame")
+    print(f"speedup:        {legacy / ring:8.2f}x")
+
+
+# Legacy processRangeDopplerHeatMap decode: Python-level byte combination,
+# Fortran reshape, np.append half swap and a list of lists per frame
+def _legacyRangeDoppler(payload, numDopplerBins, numRangeBins):
+    numBytes = numDopplerBins * numRangeBins * 2
+    rangeDoppler = list(
+        map(
+            add,
+            payload[0:numBytes:2],
+            list(map(lambda x: 256 * x, payload[1:numBytes:2])),
+        )
+    )
+    rangeDoppler = np.reshape(rangeDoppler, (numDopplerBins, numRangeBins), "F")
+    rangeDoppler = np.append(
+        rangeDoppler[int(len(rangeDoppler) / 2) :],
+        rangeDoppler[: int(len(rangeDoppler) / 2)],
+        axis=0,
+    )
+    return [list(e) for e in rangeDoppler]
+
+
+def benchRangeDoppler(args):
+    rng = np.random.default_rng(0)
+    numBytes = args.doppler_bins * args.range_bins * 2
+    payloads = [
+        rng.integers(0, 256, numBytes, dtype="uint8") for _ in range(args.frames)
+    ]
+    out = np.zeros((args.doppler_bins, args.range_bins), dtype=np.uint16)
+    # Compile outside the timing, and check both decodes agree
+    decodeRangeDoppler(payloads[0], 0, out)
+    expected = _legacyRangeDoppler(payloads[0], args.doppler_bins, args.range_bins)
+    assert np.array_equal(out, np.array(expected))
+
+    def legacy():
+        for payload in payloads:
+            _legacyRangeDoppler(payload, args.doppler_bins, args.range_bins)
+
+    def kernel():
+        for payload in payloads:
+            decodeRangeDoppler(payload, 0, out)
+
+    legacyTime = _timeit(legacy, repeat=3)
+    kernelTime = _timeit(kernel)
+    mb = numBytes * args.frames / 1e6
+    print(f"{args.frames} frames of {args.doppler_bins}x{args.range_bins}")
+    for name, seconds in (("legacy", legacyTime), ("numba", kernelTime)):
+        print(
+            f"{name:7} {args.frames / seconds:10.0f} frames/s {mb / seconds:8.1f} MB/s"
+        )
+    print(f"speedup: {legacyTime / kernelTime:.0f}x")
+
+
+# Stands in for the recording writer when only parsing is measured
+class _DiscardFrames:
+    def write(self, frame):
+        pass
+
+
+# Parser regression benchmark: feed a raw capture (rawcapture.py) through
+# the acquisition code of only_read.py, read by read as it was received
+def benchReplay(args):
+    # Only this benchmark needs the acquisition module and its imports
+    import only_read
+
+    capture = RawCapture(args.capture)
+    configParameters = only_read.parseConfigFile(capture.configFileName)
+    only_read.configParameters = configParameters
+    only_read.configureBuffer(configParameters)
+    if args.out:
+        only_read.recordingWriter = RecordingWriter(args.out, configParameters)
+    else:
+        only_read.recordingWriter = _DiscardFrames()
+    port = ReplayPort(capture, paced=args.paced)
+    only_read.frameClock = port.time
+
+    frames = 0
+    start = time.perf_counter()
+    while not port.exhausted():
+        for _ in only_read.drainFrames(port, configParameters, args.out):
+            frames += 1
+        if args.paced and not port.in_waiting:
+            time.sleep(0.001)
+    seconds = time.perf_counter() - start
+    if args.out:
+        only_read.recordingWriter.close()
+
+    print(only_read.pipelineStats)
+    print(
+        f"{len(capture)} reads, {capture.size / 1e6:.2f} MB captured over "
+        f"{capture.duration:.1f} s"
+    )
+    print(
+        f"{frames} frames in {seconds:.3f} s: {frames / seconds:10.0f} frames/s "
+        f"{capture.size / 1e6 / seconds:8.1f} MB/s"
+    )
+
+
+def parseArg():
+    parser = argparse.ArgumentParser(description="Acquisition micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    ring = sub.add_parser("ringbuffer", help="byte accumulator compaction")
+    ring.add_argument("--frames", type=int, default=5000)
+    ring.add_argument("--packet-len", type=int, default=9376)
+    ring.add_argument("--buffer-size", type=int, default=2**15)
+    ring.set_defaults(func=benchRingBuffer)
+
+    # Defaults match Configurations/pointcloud_configuration.cfg
+    rd = sub.add_parser("rangedoppler", help="range-Doppler heatmap decode")
+    rd.add_argument("--frames", type=int, default=200)
+    rd.add_argument("--doppler-bins", type=int, default=16)
+    rd.add_argument("--range-bins", type=int, default=256)
+    rd.set_defaults(func=benchRangeDoppler)
+
+    replay = sub.add_parser("replay", help="acquisition path over a raw capture")
+    replay.add_argument("capture", help="<timestamp>.uart directory")
+    replay.add_argument(
+        "--paced", action="store_true", help="replay at the recorded pace"
+    )
+    replay.add_argument("--out", help="also write a binary recording here")
+    replay.set_defaults(func=benchReplay)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parseArg()
+    args.func(args)
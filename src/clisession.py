@@ -0,0 +1,127 @@
+import time
+from collections import deque
+
+# Configuration over the sensor's CLI port. The demo echoes every command,
+# answers it with "Done" or an error message and prints its prompt:
+#
+#   mmwDemo:/>profileCfg 0 77 429 7 57.14 0 0 70 1 256 5209 0 0 30
+#   Done
+#
+# CliSession sends a command, waits for that answer and measures the round
+# trip, so a configuration takes as long as the device needs and a rejected
+# command stops it right away.
+
+PROMPT = "mmwDemo:/>"
+DONE = "Done"
+# How the demo reports a failed or unknown command
+ERRORS = ("Error", "is not recognized as a CLI command")
+
+
+class CliError(Exception):
+    def __init__(self, result):
+        super().__init__(
+            f"{result.command!r} failed after {result.rtt * 1e3:.1f} ms: "
+            + ("; ".join(result.response) or "no response")
+        )
+        self.result = result
+
+
+class CommandResult:
+    __slots__ = ("command", "ok", "rtt", "response")
+
+    def __init__(self, command, ok, rtt, response):
+        self.command = command
+        self.ok = ok
+        # Seconds from sending the command to its Done/Error line
+        self.rtt = rtt
+        # Lines the device printed for the command, echo and prompt removed
+        self.response = response
+
+    def __str__(self):
+        status = "ok" if self.ok else "FAILED"
+        return f"{self.rtt * 1e3:7.1f} ms  {status:6s} {self.command}"
+
+
+# Commands of a .cfg file. Comments (%) and blank lines are not sent, the
+# device has nothing to answer for them.
+def readCommands(configFileName):
+    with open(configFileName) as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("%")]
+
+
+class CliSession:
+    # window is how many commands may be sent before the oldest one is
+    # answered. The demo reads its UART line by line, 1 is always safe;
+    # larger windows only save the turnaround between commands.
+    def __init__(self, port, timeout=1.0, window=1):
+        self.port = port
+        self.timeout = timeout
+        self.window = window
+        self._line = bytearray()
+
+    # Next complete line from the device, or None once deadline has passed
+    def _readline(self, deadline):
+        while True:
+            end = self._line.find(b"\n")
+            if end >= 0:
+                line = bytes(self._line[:end])
+                del self._line[: end + 1]
+                return line.decode(errors="replace").strip()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            self.port.timeout = remaining
+            self._line += self.port.read(max(1, self.port.in_waiting))
+
+    def _await(self, command, sentAt):
+        deadline = sentAt + self.timeout
+        response = []
+        while True:
+            line = self._readline(deadline)
+            if line is None:
+                return CommandResult(
+                    command, False, time.perf_counter() - sentAt, response
+                )
+            if line.startswith(PROMPT):
+                line = line[len(PROMPT) :].strip()
+            # The echo of the command
+            if not line or line == command:
+                continue
+            if line == DONE:
+                return CommandResult(
+                    command, True, time.perf_counter() - sentAt, response
+                )
+            response.append(line)
+            if any(error in line for error in ERRORS):
+                return CommandResult(
+                    command, False, time.perf_counter() - sentAt, response
+                )
+
+    def send(self, command):
+        return self.run([command])[0]
+
+    # Send commands in order, yielding one CommandResult per command as it
+    # is answered. Raises CliError at the first command that fails or times
+    # out; nothing after it is sent.
+    def run(self, commands):
+        return list(self.iter_run(commands))
+
+    def iter_run(self, commands):
+        self.port.reset_input_buffer()
+        self._line.clear()
+        inFlight = deque()
+        commands = iter(commands)
+        while True:
+            while len(inFlight) < self.window:
+                command = next(commands, None)
+                if command is None:
+                    break
+                self.port.write((command + "\n").encode())
+                inFlight.append((command, time.perf_counter()))
+            if not inFlight:
+                return
+            result = self._await(*inFlight.popleft())
+            if not result.ok:
+                raise CliError(result)
+            yield result
@@ -0,0 +1,178 @@
+import argparse
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from csvsession import readAxes, readFrames
+from frame import Frame
+from recording import Recording, RecordingWriter
+from tlv import (
+    MMWDEMO_OUTPUT_MSG_NOISE_PROFILE,
+    MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP,
+    MMWDEMO_OUTPUT_MSG_STATS,
+    MMWDEMO_UART_MSG_DETECTED_POINTS,
+    MMWDEMO_UART_MSG_RANGE_PROFILE,
+)
+
+# Convert CSV recordings of only_read.py into binary recordings (see
+# recording.py), one worker process per file:
+#
+#   python convert.py 20240202_*.csv --out converted/
+#
+# Every output records the SHA-256 of its source, so running the converter
+# again over a partly converted directory only converts new or changed files.
+
+
+def sha256sum(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def isConverted(dst, sha256):
+    try:
+        return Recording(dst).header.get("source", {}).get("sha256") == sha256
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def _setAxes(configParameters, rangeArray, dopplerArray):
+    if len(rangeArray) > 1:
+        configParameters["numRangeBins"] = len(rangeArray)
+        configParameters["rangeIdxToMeters"] = rangeArray[1] - rangeArray[0]
+        configParameters["rangeArray"] = rangeArray.tolist()
+    if len(dopplerArray) > 1:
+        configParameters["numDopplerBins"] = len(dopplerArray)
+        configParameters["dopplerResolutionMps"] = dopplerArray[1] - dopplerArray[0]
+        configParameters["dopplerArray"] = dopplerArray.tolist()
+
+
+# The CSV carries no configuration, so the array shapes and the axes are
+# taken from the axes sidecar when there is one, otherwise from the first
+# frame with a range profile or heatmap. Which TLVs a session has is fixed
+# by its guiMonitor line, so a frame without the heatmap means the session
+# has none.
+def _inferConfig(filename):
+    configParameters = {"numRangeBins": 0, "numDopplerBins": 0}
+    axes = readAxes(filename)
+    if axes:
+        _setAxes(configParameters, axes["rangeArray"], axes["dopplerArray"])
+        return configParameters
+
+    columns = {"rp", "rangeDoppler", "rangeArray", "dopplerArray"}
+    for frame in readFrames(filename, columns):
+        if "rangeDoppler" in frame:
+            numDopplerBins, numRangeBins = frame["rangeDoppler"].shape
+            configParameters["numDopplerBins"] = numDopplerBins
+            configParameters["numRangeBins"] = numRangeBins
+            # Older recordings wrote the axes in the rows with the heatmap
+            _setAxes(
+                configParameters,
+                frame.get("rangeArray", ()),
+                frame.get("dopplerArray", ()),
+            )
+            break
+        if "rp" in frame:
+            configParameters["numRangeBins"] = len(frame["rp"])
+            break
+    return configParameters
+
+
+# Copy a readFrames frame into the reused Frame RecordingWriter takes
+def _fill(frame, row):
+    frame.reset(row["frameNumber"], row["timestamp"])
+    if "points" in row:
+        frame.resize_points(len(row["points"]))[...] = row["points"]
+        frame.mark(MMWDEMO_UART_MSG_DETECTED_POINTS)
+    if "rp" in row:
+        frame.rp[:] = row["rp"]
+        frame.mark(MMWDEMO_UART_MSG_RANGE_PROFILE)
+    if "noiserp" in row:
+        frame.noiserp[:] = row["noiserp"]
+        frame.mark(MMWDEMO_OUTPUT_MSG_NOISE_PROFILE)
+    if "rangeDoppler" in row:
+        frame.rangeDoppler[...] = row["rangeDoppler"]
+        frame.mark(MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP)
+    if "stats" in row:
+        frame.stats[...] = row["stats"]
+        frame.mark(MMWDEMO_OUTPUT_MSG_STATS)
+    return frame
+
+
+# Worker: convert one CSV file. The recording is written next to dst and
+# renamed into place once complete.
+def convertFile(src, dst, sha256):
+    start = time.perf_counter()
+    tmp = dst.with_name(dst.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    configParameters = _inferConfig(src)
+    writer = RecordingWriter(
+        tmp, configParameters, source={"name": src.name, "sha256": sha256}
+    )
+    frame = Frame(configParameters["numRangeBins"], configParameters["numDopplerBins"])
+    numFrames = 0
+    columns = {"points", "rp", "noiserp", "rangeDoppler", "stats"}
+    for row in readFrames(src, columns):
+        writer.write(_fill(frame, row))
+        numFrames += 1
+    writer.close()
+
+    shutil.rmtree(dst, ignore_errors=True)
+    os.replace(tmp, dst)
+    return numFrames, time.perf_counter() - start
+
+
+def _inputs(paths):
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(path.glob("*.csv"))
+        else:
+            yield path
+
+
+def parseArg():
+    parser = argparse.ArgumentParser(
+        description="Convert CSV recordings to binary recordings"
+    )
+    parser.add_argument("inputs", nargs="+", help="CSV files or directories")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="Worker processes"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parseArg()
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    jobs = []
+    for src in _inputs(args.inputs):
+        dst = out / (src.stem + ".mmw")
+        sha256 = sha256sum(src)
+        if isConverted(dst, sha256):
+            print(f"{src.name}: up to date")
+        else:
+            jobs.append((src, dst, sha256))
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(convertFile, *job): job for job in jobs}
+        for future in as_completed(futures):
+            src, dst, _ = futures[future]
+            try:
+                numFrames, seconds = future.result()
+            except Exception as e:
+                print(f"{src.name}: failed: {e}")
+                continue
+            size = sum(f.stat().st_size for f in dst.iterdir())
+            print(
+                f"{src.name}: {numFrames} frames in {seconds:.2f} s, "
+                f"{src.stat().st_size / 1e6:.2f} MB -> {size / 1e6:.2f} MB"
+            )
@@ -0,0 +1,140 @@
+import csv
+import json
+import time
+
+import numpy as np
+
+from recording import POINT_DTYPE
+from tlv import STATS_DTYPE
+
+# Reader for the CSV recordings written by only_read.py (see header there).
+# List-valued cells hold Python list literals such as "[40815, 42509]" or
+# "[[1, 2], [3, 4]]"; they are parsed with NumPy's C text parser rather
+# than ast.literal_eval.
+#
+#   for frame in readFrames("20240202_185342.csv", columns={"points", "rp"}):
+#       frame["points"]["x"], frame["rp"]
+#
+# Frames are decoded one row at a time, so memory use does not grow with the
+# length of the recording.
+#
+# Older recordings repeat the range and Doppler axes in the rangeArray and
+# dopplerArray cells of every row with a heatmap. Newer ones leave those
+# cells empty and keep the axes once in <name>.csv.axes.json; readFrames
+# returns them the same way for both.
+
+# Cells of a rangeDoppler heatmap can exceed the csv module's default limit
+csv.field_size_limit(2**31 - 1)
+
+# Everything readFrames can decode. Columns missing from the row (e.g. a TLV
+# the configuration did not enable) are left out of the frame.
+COLUMNS = frozenset(
+    ["points", "rp", "noiserp", "rangeDoppler", "rangeArray", "dopplerArray", "stats"]
+)
+
+
+# Axes of the configuration, the columns they used to be written to
+AXES = ("rangeArray", "dopplerArray")
+
+
+def axesPath(filename):
+    return str(filename) + ".axes.json"
+
+
+# The axes of a recording as float64 arrays, empty without a sidecar
+def readAxes(filename):
+    try:
+        with open(axesPath(filename)) as f:
+            axes = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {name: np.asarray(axes[name], dtype=np.float64) for name in AXES}
+
+
+def parseListCell(cell, dtype=np.float64):
+    return np.fromstring(cell.strip("[] "), dtype=dtype, sep=",")
+
+
+# Nested list cell, one row per inner list
+def parseMatrixCell(cell, dtype=np.float64):
+    numRows = cell.count("[") - 1
+    values = np.fromstring(
+        cell.replace("[", " ").replace("]", " "), dtype=dtype, sep=","
+    )
+    return values.reshape(numRows, -1) if numRows > 0 else values.reshape(0, 0)
+
+
+# Seconds since the epoch from the Date ("%d/%m/%Y") and Time ("%H%M%S")
+# columns
+def parseTimestamp(date, hms):
+    return time.mktime(time.strptime(f"{date} {hms}", "%d/%m/%Y %H%M%S"))
+
+
+# Rows from byte offset start on (the start of a row, see frameindex.py)
+def readRows(filename, start=None):
+    with open(filename, newline="") as f:
+        reader = csv.DictReader(f)
+        if start is not None:
+            reader.fieldnames  # reads the header line
+            f.seek(start)
+        for row in reader:
+            # Files written on Windows have an empty line after every row
+            if row.get("Date"):
+                yield row
+
+
+def parsePoints(row):
+    numObj = int(row["numObj"])
+    points = np.zeros(numObj, dtype=POINT_DTYPE)
+    for name in POINT_DTYPE.names:
+        # snr and noise are only written with SDK 3.x side info
+        if row.get(name):
+            points[name] = parseListCell(row[name], POINT_DTYPE[name])
+    return points
+
+
+# One frame per row as a dict with frameNumber (the row index, the CSV has no
+# frameNumber column), timestamp and the requested columns: points as a
+# POINT_DTYPE array, rp/noiserp as uint16, rangeDoppler as a uint16
+# (numDopplerBins, numRangeBins) array, the axes as float64 and stats as a
+# STATS_DTYPE record. Columns that are not requested are never decoded.
+# With start > 0 reading begins at that frame, located through the frame
+# index instead of reading the rows before it.
+def readFrames(filename, columns=COLUMNS, start=0):
+    unknown = set(columns) - COLUMNS
+    if unknown:
+        raise ValueError(f"Unknown columns {sorted(unknown)}")
+
+    offset = None
+    if start:
+        from frameindex import FrameIndex
+
+        index = FrameIndex(filename)
+        if start >= len(index):
+            return
+        offset = int(index[start]["offset"])
+
+    axes = readAxes(filename) if set(AXES) & set(columns) else {}
+    for frameNumber, row in enumerate(readRows(filename, offset), start):
+        frame = {
+            "frameNumber": frameNumber,
+            "timestamp": parseTimestamp(row["Date"], row["Time"]),
+        }
+        if "points" in columns and row.get("numObj"):
+            frame["points"] = parsePoints(row)
+        for name in ("rp", "noiserp"):
+            if name in columns and row.get(name):
+                frame[name] = parseListCell(row[name], np.uint16)
+        if "rangeDoppler" in columns and row.get("rangeDoppler"):
+            frame["rangeDoppler"] = parseMatrixCell(row["rangeDoppler"], np.uint16)
+        for name in AXES:
+            if name in columns and row.get(name):
+                frame[name] = parseListCell(row[name])
+            elif name in columns and name in axes and row.get("rangeDoppler"):
+                frame[name] = axes[name]
+        if "stats" in columns and all(row.get(name) for name in STATS_DTYPE.names):
+            stats = np.zeros((), dtype=STATS_DTYPE)
+            for name in STATS_DTYPE.names:
+                stats[name] = int(row[name])
+            frame["stats"] = stats
+        yield frame
@@ -0,0 +1,124 @@
+import csv
+import time
+from collections import deque
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+
+from serialreader import LatencyStats
+
+
+# Appends rows to the recording from a background thread. The file stays
+# open, rows are taken from a bounded queue in batches and the file is
+# flushed once batchSize rows are pending or flushInterval seconds have
+# passed. put() never blocks: when the queue is full the row is dropped and
+# counted, so acquisition never waits on the disk. Rows are given as
+# frame.Frame and only turned into text on this thread. File switches do not
+# go through the queue, so they are never dropped or waited for either.
+class CsvWriterThread(Thread):
+    def __init__(
+        self, filename, fieldnames, maxFrames=256, batchSize=32, flushInterval=1.0
+    ):
+        super().__init__()
+        self.daemon = True
+
+        self._stop_event = Event()
+
+        self.fieldnames = fieldnames
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval
+        self.frames = Queue(maxsize=maxFrames)
+        # Time from put() to the row being handed to the file
+        self.latency = LatencyStats()
+        self.maxDepth = 0
+        self.droppedFrames = 0
+        # Rows queued so far and written so far
+        self.queuedFrames = 0
+        self.writtenFrames = 0
+        # (queuedFrames at the switch, filename) of every pending switch
+        self.switches = deque()
+
+        self.file = None
+        self._open(filename)
+
+    def _open(self, filename):
+        self._close_file()
+        self.filename = filename
+        self.file = open(filename, "a", newline="")
+        self.writer = csv.DictWriter(self.file, self.fieldnames)
+
+    def _close_file(self):
+        if self.file:
+            self.file.flush()
+            self.file.close()
+            self.file = None
+
+    def put(self, frame):
+        try:
+            # The parser reuses its frame for the next packet
+            self.frames.put_nowait((time.perf_counter(), frame.copy()))
+            self.queuedFrames += 1
+        except Full:
+            self.droppedFrames += 1
+        self.maxDepth = max(self.maxDepth, self.frames.qsize())
+
+    # Switch to another file once the rows queued before are written
+    def set_file(self, filename):
+        self.switches.append((self.queuedFrames, filename))
+
+    # Open the next file once every row queued before the switch is written
+    def _switch(self):
+        switched = False
+        while self.switches and self.switches[0][0] <= self.writtenFrames:
+            self._open(self.switches.popleft()[1])
+            switched = True
+        return switched
+
+    def depth(self):
+        return self.frames.qsize()
+
+    def run(self):
+        lastFlush = time.perf_counter()
+        pending = 0
+        while True:
+            try:
+                batch = [self.frames.get(timeout=self.flushInterval)]
+            except Empty:
+                batch = []
+                if self._stop_event.is_set():
+                    break
+            while len(batch) < self.batchSize:
+                try:
+                    batch.append(self.frames.get_nowait())
+                except Empty:
+                    break
+
+            for queuedAt, frame in batch:
+                if self._switch():
+                    pending = 0
+                self.writer.writerow(frame.row())
+                self.writtenFrames += 1
+                self.latency.add(time.perf_counter() - queuedAt)
+                pending += 1
+            if self._switch():
+                pending = 0
+
+            now = time.perf_counter()
+            if pending and (
+                pending >= self.batchSize or now - lastFlush >= self.flushInterval
+            ):
+                self.file.flush()
+                pending = 0
+                lastFlush = now
+        self._switch()
+        self._close_file()
+
+    # Write whatever is still queued, then close the file
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def __str__(self):
+        return (
+            f"csv writer: queue depth {self.depth()} (max {self.maxDepth}), "
+            f"{self.droppedFrames} dropped, write {self.latency}"
+        )
@@ -0,0 +1,419 @@
+import argparse
+import os
+import select
+import time
+import tty
+from threading import Event, Lock, Thread
+
+import numpy as np
+
+from radarconfig import parseConfig
+from tlv import (
+    DETECTED_OBJ_DTYPE,
+    FRAME_HEADER_DTYPE,
+    MAGIC_WORD,
+    MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP,
+    MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO,
+    MMWDEMO_OUTPUT_MSG_NOISE_PROFILE,
+    MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP,
+    MMWDEMO_OUTPUT_MSG_STATS,
+    MMWDEMO_UART_MSG_DETECTED_POINTS,
+    MMWDEMO_UART_MSG_RANGE_PROFILE,
+    OBJ_DESCRIPTOR_DTYPE,
+    PACKET_ALIGN,
+    POINT_CLOUD_DTYPE,
+    SIDE_INFO_DTYPE,
+    STATS_DTYPE,
+    TLV_HEADER_DTYPE,
+)
+
+# Stand-in for an xWR16xx running the out-of-box demo, to load test the host
+# pipeline without hardware. It opens a pty pair for the CLI port and one
+# for the data port:
+#
+#   python emulator.py --fps 120
+#   CLI_PORT=/dev/pts/3
+#   DATA_PORT=/dev/pts/4
+#
+# With those two variables in the environment (or .env), only_read.py
+# configures and reads the emulator instead of the board. The CLI answers
+# like the demo; sensorStart sends packets laid out as the profileCfg,
+# frameCfg, channelCfg and guiMonitor commands received say, at the
+# configured frame rate or at --fps. The packet contents are synthetic.
+#
+# A pty has no baud rate, so rates far beyond the 921600 baud of the real
+# data port are possible. Bytes the host does not read in time are dropped
+# once the pty is full, as the UART would.
+#
+# --sdk 3 sends the float point cloud and side info TLVs of SDK 3.x instead
+# of the Q format object list.
+
+VERSIONS = {
+    2: 0x02010004,  # SDK 2.1.0.4
+    3: 0x03050004,  # SDK 3.5.0.4
+}
+PLATFORM = 0xA1642
+CPU_CLOCK = 200e6
+# Q format of the x, y, z coordinates of the detected points
+XYZ_Q_FORMAT = 9
+
+PROMPT = b"mmwDemo:/>"
+
+
+# Builds the packets of a configuration, config being its
+# radarconfig.RadarConfig.parameters(). Everything but the payload values is
+# the same from frame to frame.
+class PacketBuilder:
+    def __init__(self, config, numObj=8, seed=None, sdk=2):
+        self.config = config
+        self.numObj = numObj
+        self.sdk = sdk
+        self.rng = np.random.default_rng(seed)
+        numRangeBins = config["numRangeBins"]
+        # A log-magnitude like profile falling with range
+        self.profile = np.linspace(9000, 3000, numRangeBins).astype("<u2")
+        self.header = np.zeros((), dtype=FRAME_HEADER_DTYPE)
+        self.header["magicWord"] = np.frombuffer(MAGIC_WORD, dtype="u1")
+        self.header["version"] = VERSIONS[sdk]
+        self.header["platform"] = PLATFORM
+        self.tlvs = list(config["enabledTlvs"])
+        if sdk >= 3 and MMWDEMO_UART_MSG_DETECTED_POINTS in self.tlvs:
+            # The side info follows the points
+            index = self.tlvs.index(MMWDEMO_UART_MSG_DETECTED_POINTS)
+            self.tlvs.insert(index + 1, MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO)
+        self.header["numTLVs"] = len(self.tlvs)
+        self.cyclesPerFrame = int(config["framePeriodicity"] * 1e-3 * CPU_CLOCK)
+
+    def _payload(self, tlv_type):
+        config = self.config
+        numRangeBins = config["numRangeBins"]
+        rng = self.rng
+        if tlv_type == MMWDEMO_UART_MSG_DETECTED_POINTS and self.sdk >= 3:
+            points = np.zeros(self.numObj, dtype=POINT_CLOUD_DTYPE)
+            # Within 8 m, in front of the sensor
+            points["x"] = rng.uniform(-4, 4, self.numObj)
+            points["y"] = rng.uniform(0, 8, self.numObj)
+            points["z"] = rng.uniform(-1, 1, self.numObj)
+            points["velocity"] = rng.uniform(-2, 2, self.numObj)
+            return points.tobytes()
+        if tlv_type == MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO:
+            sideInfo = np.zeros(self.numObj, dtype=SIDE_INFO_DTYPE)
+            sideInfo["snr"] = rng.integers(50, 400, self.numObj)
+            sideInfo["noise"] = rng.integers(100, 300, self.numObj)
+            return sideInfo.tobytes()
+        if tlv_type == MMWDEMO_UART_MSG_DETECTED_POINTS:
+            descriptor = np.zeros((), dtype=OBJ_DESCRIPTOR_DTYPE)
+            descriptor["numObj"] = self.numObj
+            descriptor["xyzQFormat"] = XYZ_Q_FORMAT
+            objects = np.zeros(self.numObj, dtype=DETECTED_OBJ_DTYPE)
+            half = config["numDopplerBins"] // 2
+            objects["rangeIdx"] = rng.integers(0, numRangeBins, self.numObj)
+            objects["dopplerIdx"] = rng.integers(-half, half, self.numObj)
+            objects["peakVal"] = rng.integers(100, 5000, self.numObj)
+            # Within 8 m, in front of the sensor
+            scale = 1 << XYZ_Q_FORMAT
+            objects["x"] = rng.integers(-4 * scale, 4 * scale, self.numObj)
+            objects["y"] = rng.integers(0, 8 * scale, self.numObj)
+            objects["z"] = rng.integers(-scale, scale, self.numObj)
+            return descriptor.tobytes() + objects.tobytes()
+        if tlv_type == MMWDEMO_UART_MSG_RANGE_PROFILE:
+            return (self.profile + rng.integers(0, 500, numRangeBins)).astype(
+                "<u2"
+            ).tobytes()
+        if tlv_type == MMWDEMO_OUTPUT_MSG_NOISE_PROFILE:
+            return (self.profile // 2 + rng.integers(0, 200, numRangeBins)).astype(
+                "<u2"
+            ).tobytes()
+        if tlv_type == MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP:
+            # Complex int16 per range bin and virtual antenna
+            size = 2 * numRangeBins * config["numVirtualAntennas"]
+            return rng.integers(-3000, 3000, size).astype("<i2").tobytes()
+        if tlv_type == MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP:
+            size = numRangeBins * config["numDopplerBins"]
+            return rng.integers(0, 60000, size).astype("<u2").tobytes()
+        if tlv_type == MMWDEMO_OUTPUT_MSG_STATS:
+            stats = np.zeros((), dtype=STATS_DTYPE)
+            for name in STATS_DTYPE.names:
+                stats[name] = rng.integers(0, 10000)
+            return stats.tobytes()
+        raise ValueError(f"Unknown TLV type {tlv_type}")
+
+    def packet(self, frameNumber):
+        body = bytearray()
+        for tlv_type in self.tlvs:
+            payload = self._payload(tlv_type)
+            tlv = np.zeros((), dtype=TLV_HEADER_DTYPE)
+            tlv["type"] = tlv_type
+            tlv["length"] = len(payload)
+            body += tlv.tobytes()
+            body += payload
+        length = FRAME_HEADER_DTYPE.itemsize + len(body)
+        padding = -length % PACKET_ALIGN
+        header = self.header
+        header["totalPacketLen"] = length + padding
+        header["frameNumber"] = frameNumber
+        header["timeCpuCycles"] = (frameNumber * self.cyclesPerFrame) & 0xFFFFFFFF
+        if MMWDEMO_UART_MSG_DETECTED_POINTS in self.config["enabledTlvs"]:
+            header["numDetectedObj"] = self.numObj
+        return header.tobytes() + bytes(body) + bytes(padding)
+
+
+# A pty whose master end the emulator writes and whose slave end the host
+# opens as a serial port
+class _Pty:
+    def __init__(self):
+        self.master, self.slave = os.openpty()
+        # Raw like a serial port, until the host configures it itself
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.name = os.ttyname(self.slave)
+
+    # Write what the pty takes, return how many bytes it did not
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self.master, view)
+            except BlockingIOError:
+                return len(view)
+            view = view[written:]
+        return 0
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class _DataThread(Thread):
+    def __init__(self, device, config):
+        super().__init__()
+        self.daemon = True
+
+        self._stop_event = Event()
+
+        self.device = device
+        self.builder = PacketBuilder(config, device.numObj, device.seed, device.sdk)
+        fps = device.fps or 1e3 / config["framePeriodicity"]
+        self.period = 1 / fps
+        self.rng = np.random.default_rng(device.seed)
+
+    # Injected line noise and lost bytes
+    def _corrupt(self, packet):
+        device, rng = self.device, self.rng
+        if device.drop and rng.random() < device.drop:
+            count = int(rng.integers(1, 65))
+            start = int(rng.integers(0, len(packet)))
+            device.count("droppedBytes", len(packet[start : start + count]))
+            packet = packet[:start] + packet[start + count :]
+        if device.noise and rng.random() < device.noise:
+            noise = rng.integers(0, 256, int(rng.integers(1, 65)), dtype="u1")
+            packet = noise.tobytes() + packet
+            device.count("noiseBytes", len(noise))
+        return packet
+
+    def run(self):
+        device = self.device
+        frameNumber = 1
+        deadline = time.perf_counter()
+        while not self._stop_event.is_set():
+            packet = self._corrupt(self.builder.packet(frameNumber))
+            overrun = device.data.write(packet)
+            device.count("frames", 1)
+            device.count("bytes", len(packet) - overrun)
+            device.count("overrunBytes", overrun)
+            frameNumber += 1
+
+            deadline += self.period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            elif delay < -self.period:
+                # Behind by more than a frame, do not try to catch up
+                deadline = time.perf_counter()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# The emulated board. fps overrides the frame period of frameCfg, noise and
+# drop are per-packet probabilities of a burst of up to 64 random bytes
+# before the packet and of up to 64 bytes missing from it. Commands named in
+# reject are answered with an error.
+class EmulatedDevice(Thread):
+    def __init__(
+        self, fps=None, numObj=8, noise=0.0, drop=0.0, seed=None, reject=(), sdk=2
+    ):
+        super().__init__()
+        self.daemon = True
+
+        self._stop_event = Event()
+
+        self.fps = fps
+        self.numObj = numObj
+        self.noise = noise
+        self.drop = drop
+        self.seed = seed
+        self.reject = set(reject)
+        self.sdk = sdk
+
+        self.cli = _Pty()
+        self.data = _Pty()
+        self.cliPort = self.cli.name
+        self.dataPort = self.data.name
+        # Configuration commands received since the last flushCfg
+        self.commands = []
+        self.sensor = None
+
+        self.lock = Lock()
+        self.counters = dict.fromkeys(
+            ["frames", "bytes", "overrunBytes", "noiseBytes", "droppedBytes"], 0
+        )
+
+    def count(self, name, n):
+        with self.lock:
+            self.counters[name] += n
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def _answer(self, line):
+        words = line.split()
+        name = words[0]
+        if name in self.reject:
+            return "Error -1"
+        if name == "sensorStop":
+            if self.sensor is None:
+                return "Ignored: Sensor is already stopped\r\nDone"
+            self.sensor.stop()
+            self.sensor = None
+        elif name == "flushCfg":
+            self.commands = []
+        elif name == "sensorStart":
+            if self.sensor is not None:
+                return "Ignored: Sensor is already started\r\nDone"
+            try:
+                config = parseConfig(self.commands).parameters()
+            except ValueError as e:
+                return f"Error: {e}"
+            self.sensor = _DataThread(self, config)
+            self.sensor.start()
+        else:
+            self.commands.append(line)
+        return "Done"
+
+    # Answer the CLI until stopped
+    def run(self):
+        self.cli.write(PROMPT)
+        received = b""
+        while not self._stop_event.is_set():
+            if not select.select([self.cli.master], [], [], 0.2)[0]:
+                continue
+            try:
+                received += os.read(self.cli.master, 4096)
+            except OSError:
+                break
+            *lines, received = received.split(b"\n")
+            for line in lines:
+                line = line.decode(errors="replace").strip()
+                if not line:
+                    continue
+                answer = self._answer(line)
+                self.cli.write(f"{line}\r\n{answer}\r\n".encode() + PROMPT)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        if self.sensor is not None:
+            self.sensor.stop()
+        self.cli.close()
+        self.data.close()
+
+
+def parseArg():
+    parser = argparse.ArgumentParser(description="Emulate an xWR16xx on two ptys")
+    parser.add_argument(
+        "--fps",
+        help="Frame rate, by default the frame period of frameCfg",
+        type=float,
+    )
+    parser.add_argument(
+        "--objects",
+        help="Detected points per frame",
+        type=int,
+        default=8,
+    )
+    parser.add_argument(
+        "--noise",
+        help="Probability of random bytes before a packet",
+        type=float,
+        default=0.0,
+    )
+    parser.add_argument(
+        "--drop",
+        help="Probability of bytes missing from a packet",
+        type=float,
+        default=0.0,
+    )
+    parser.add_argument(
+        "--seed",
+        help="Seed of the packet contents and of the injected errors",
+        type=int,
+    )
+    parser.add_argument(
+        "--reject",
+        help="Answer this CLI command with an error",
+        action="append",
+        default=[],
+        metavar="COMMAND",
+    )
+    parser.add_argument(
+        "--sdk",
+        help="SDK major version whose packet layout to send",
+        type=int,
+        choices=sorted(VERSIONS),
+        default=2,
+    )
+    parser.add_argument(
+        "--stats",
+        help="Print the sent frames every STATS seconds",
+        type=float,
+        default=5,
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parseArg()
+    device = EmulatedDevice(
+        args.fps,
+        args.objects,
+        args.noise,
+        args.drop,
+        args.seed,
+        args.reject,
+        args.sdk,
+    )
+    device.start()
+    print(f"CLI_PORT={device.cliPort}")
+    print(f"DATA_PORT={device.dataPort}", flush=True)
+
+    last, lastTime = device.snapshot(), time.perf_counter()
+    try:
+        while True:
+            time.sleep(args.stats)
+            now, nowTime = device.snapshot(), time.perf_counter()
+            elapsed = nowTime - lastTime
+            print(
+                f"{(now['frames'] - last['frames']) / elapsed:.1f} fps, "
+                f"{(now['bytes'] - last['bytes']) / elapsed / 1e6:.2f} MB/s, "
+                f"{now['frames']} frames, {now['overrunBytes']} overrun, "
+                f"{now['noiseBytes']} noise and {now['droppedBytes']} dropped bytes",
+                flush=True,
+            )
+            last, lastTime = now, nowTime
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
@@ -0,0 +1,170 @@
+import time
+
+import numpy as np
+
+from tlv import (
+    MAX_DETECTED_OBJ,
+    MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP,
+    MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO,
+    MMWDEMO_OUTPUT_MSG_NOISE_PROFILE,
+    MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP,
+    MMWDEMO_UART_MSG_DETECTED_POINTS,
+    MMWDEMO_UART_MSG_RANGE_PROFILE,
+    STATS_DTYPE,
+)
+
+# One parsed frame. The arrays are allocated once for a configuration and
+# filled in place by the TLV parsers of only_read.py, so parsing a frame
+# allocates next to nothing. The sinks (CSV, binary recording, shared
+# memory, network) read the arrays directly; a sink that keeps a frame
+# beyond the call, such as the background CSV writer, takes a copy().
+#
+# Bit (1 << tlv_type) of tlvMask is set for every TLV the frame carried,
+# fields of TLVs it did not carry hold stale values. Frames only carry
+# measurements; the range and Doppler axes are those of the configuration
+# (rangeArray and dopplerArray of configParameters).
+#
+# zi is the range-azimuth heatmap resampled onto a gridSize x gridSize
+# Cartesian grid. It only exists (gridSize > 0) when the configuration
+# enables the azimuth TLV, and is only filled for the live sinks, the CSV
+# and the binary recordings do not store it.
+
+# Side of the Cartesian azimuth heatmap grid
+AZIMUTH_GRID_SIZE = 100
+
+
+# gridSize of the frames of a configuration
+def azimuthGridSize(configParameters):
+    if MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP in configParameters.get(
+        "enabledTlvs", ()
+    ):
+        return AZIMUTH_GRID_SIZE
+    return 0
+
+# Detected points as the parsers compute them from either SDK's layout.
+# Wider than recording.POINT_DTYPE so the CSV rows keep their full
+# precision. snr and noise (0.1 dB) only come with SDK 3.x side info.
+FRAME_POINT_DTYPE = np.dtype(
+    [
+        ("rangeIdx", "<i2"),
+        ("dopplerIdx", "<i2"),
+        ("peakVal", "<i2"),
+        ("x", "<f8"),
+        ("y", "<f8"),
+        ("z", "<f8"),
+        ("range", "<f8"),
+        ("doppler", "<f8"),
+        ("snr", "<i2"),
+        ("noise", "<i2"),
+    ]
+)
+
+# Point fields every frame with detected points writes to the CSV
+POINT_COLUMNS = FRAME_POINT_DTYPE.names[:-2]
+
+
+class Frame:
+    __slots__ = (
+        "frameNumber",
+        "timestamp",
+        "tlvMask",
+        "numObj",
+        "_points",
+        "rp",
+        "noiserp",
+        "rangeDoppler",
+        "zi",
+        "stats",
+    )
+
+    def __init__(
+        self, numRangeBins, numDopplerBins, maxObj=MAX_DETECTED_OBJ, gridSize=0
+    ):
+        numRangeBins = int(numRangeBins)
+        numDopplerBins = int(numDopplerBins)
+        self._points = np.zeros(maxObj, dtype=FRAME_POINT_DTYPE)
+        self.rp = np.zeros(numRangeBins, dtype=np.uint16)
+        self.noiserp = np.zeros(numRangeBins, dtype=np.uint16)
+        self.rangeDoppler = np.zeros((numDopplerBins, numRangeBins), dtype=np.uint16)
+        self.zi = np.zeros((gridSize, gridSize), dtype=np.float32)
+        self.stats = np.zeros((), dtype=STATS_DTYPE)
+        self.reset(0)
+
+    @property
+    def numRangeBins(self):
+        return len(self.rp)
+
+    @property
+    def numDopplerBins(self):
+        return len(self.rangeDoppler)
+
+    @property
+    def gridSize(self):
+        return len(self.zi)
+
+    # Start a new frame
+    def reset(self, frameNumber, timestamp=None):
+        self.frameNumber = frameNumber
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.tlvMask = 0
+        self.numObj = 0
+
+    def mark(self, tlv_type):
+        self.tlvMask |= 1 << tlv_type
+
+    def has(self, tlv_type):
+        return bool(self.tlvMask & (1 << tlv_type))
+
+    @property
+    def points(self):
+        return self._points[: self.numObj]
+
+    # Make room for numObj points and return them. The storage only grows.
+    def resize_points(self, numObj):
+        if numObj > len(self._points):
+            self._points = np.zeros(numObj, dtype=FRAME_POINT_DTYPE)
+        self.numObj = numObj
+        return self.points
+
+    def copy(self):
+        frame = Frame.__new__(Frame)
+        frame.frameNumber = self.frameNumber
+        frame.timestamp = self.timestamp
+        frame.tlvMask = self.tlvMask
+        frame.numObj = self.numObj
+        frame._points = self.points.copy()
+        frame.rp = self.rp.copy()
+        frame.noiserp = self.noiserp.copy()
+        frame.rangeDoppler = self.rangeDoppler.copy()
+        frame.zi = self.zi.copy()
+        frame.stats = self.stats.copy()
+        return frame
+
+    # The CSV row of only_read.py's header. Lists are only built here, in
+    # whichever thread writes the row.
+    def row(self):
+        localtime = time.localtime(self.timestamp)
+        row = {
+            "Date": time.strftime("%d/%m/%Y", localtime),
+            "Time": time.strftime("%H%M%S", localtime),
+        }
+        if self.has(MMWDEMO_UART_MSG_DETECTED_POINTS):
+            points = self.points
+            row["numObj"] = self.numObj
+            for name in POINT_COLUMNS:
+                row[name] = points[name].tolist()
+            if self.has(MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO):
+                row["snr"] = points["snr"].tolist()
+                row["noise"] = points["noise"].tolist()
+        if self.has(MMWDEMO_UART_MSG_RANGE_PROFILE):
+            row["rp"] = self.rp.tolist()
+        if self.has(MMWDEMO_OUTPUT_MSG_NOISE_PROFILE):
+            row["noiserp"] = self.noiserp.tolist()
+        if self.has(MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP):
+            row["rangeDoppler"] = self.rangeDoppler.tolist()
+        # Statistics have never been written to the CSV, its columns stay
+        # empty. Neither are the axes, they are the configuration's.
+        return row
+
+    def __repr__(self):
+        return f"Frame({self.row()})"
@@ -0,0 +1,114 @@
+import os
+from pathlib import Path
+
+import numpy as np
+from msgspec import Struct
+from msgspec.json import decode
+
+from csvsession import parseTimestamp
+
+# Byte-offset index of the frames of a line based recording: the CSV files
+# of only_read.py and the JSON lines files main.py replays. The index is
+# kept next to the recording as <name>.idx.npz and rebuilt when the
+# recording changes, so after the first scan any frame is one seek away:
+#
+#   index = FrameIndex("20240202_185342.csv")
+#   index.seek(f, index.find(timestamp))
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("offset", "<u8"),
+        ("frameNumber", "<i8"),
+        # Seconds since the epoch, NaN when the recording has no timestamps
+        ("timestamp", "<f8"),
+    ]
+)
+
+
+# The fields the index needs from a JSON line, the rest is skipped
+class _IndexFields(Struct):
+    frameNumber: int | None = None
+    timestamp: float | None = None
+
+
+def _scanCsv(f):
+    f.readline()
+    offset = f.tell()
+    frameNumber = 0
+    for line in f:
+        # Files written on Windows have an empty line after every row
+        if line.strip():
+            date, hms, _ = line.split(b",", 2)
+            # The CSV has no frameNumber column, frames are numbered by row
+            # as in csvsession.readFrames
+            yield offset, frameNumber, parseTimestamp(date.decode(), hms.decode())
+            frameNumber += 1
+        offset += len(line)
+
+
+def _scanJsonLines(f):
+    offset = 0
+    for lineNumber, line in enumerate(f):
+        if line.strip():
+            fields = decode(line, type=_IndexFields)
+            yield (
+                offset,
+                lineNumber if fields.frameNumber is None else fields.frameNumber,
+                np.nan if fields.timestamp is None else fields.timestamp,
+            )
+        offset += len(line)
+
+
+def buildIndex(path):
+    path = Path(path)
+    scan = _scanCsv if path.suffix == ".csv" else _scanJsonLines
+    with open(path, "rb") as f:
+        return np.array(list(scan(f)), dtype=INDEX_DTYPE)
+
+
+def indexPath(path):
+    path = Path(path)
+    return path.with_name(path.name + ".idx.npz")
+
+
+# Index of the recording at path, from the sidecar while the recording's
+# mtime and size still match, otherwise rebuilt and saved
+def loadIndex(path):
+    stat = os.stat(path)
+    sidecar = indexPath(path)
+    try:
+        with np.load(sidecar) as saved:
+            if (int(saved["mtime"]), int(saved["size"])) == (
+                stat.st_mtime_ns,
+                stat.st_size,
+            ):
+                return saved["index"]
+    except (OSError, KeyError, ValueError):
+        pass
+
+    index = buildIndex(path)
+    tmp = sidecar.with_name(sidecar.name + ".tmp.npz")
+    np.savez(tmp, index=index, mtime=stat.st_mtime_ns, size=stat.st_size)
+    os.replace(tmp, sidecar)
+    return index
+
+
+class FrameIndex:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = loadIndex(path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, n):
+        return self.entries[n]
+
+    # Position f (opened in binary mode) at the start of frame n
+    def seek(self, f, n):
+        f.seek(int(self.entries[n]["offset"]))
+
+    # Number of the first frame recorded at or after timestamp
+    def find(self, timestamp):
+        n = np.searchsorted(self.entries["timestamp"], timestamp)
+        return min(int(n), len(self.entries) - 1)
@@ -0,0 +1,92 @@
+from collections import deque
+
+from tlv import FRAME_HEADER_DTYPE, MAGIC_WORD, parseFrameHeader
+
+
+# Finds packet boundaries in a RingBuffer incrementally. scanPos is the
+# absolute stream offset before which every magic word has already been
+# found, so each scan only searches the bytes that arrived since the last
+# one (plus a possibly incomplete packet at the end).
+#
+# Bytes that cannot be part of a packet are consumed from the buffer as they
+# are skipped, so after scan() the buffer starts at the first pending packet
+# or at the unscanned tail. skippedBytes counts them, including the bytes of
+# packets cut short by the next magic word.
+class FrameSync:
+    def __init__(self, ringBuffer):
+        self.buffer = ringBuffer
+        self.skippedBytes = 0
+        self.reset()
+
+    def reset(self):
+        self.scanPos = self.buffer.readPos
+        self.pending = deque()  # (absolute start, totalPacketLen)
+        # The incomplete packet at partialStart has been searched for an
+        # inner magic word up to partialScanned
+        self.partialStart = -1
+        self.partialScanned = 0
+
+    # Return (offset, totalPacketLen) of every complete packet in the buffer,
+    # offsets being relative to the buffer's readPos. A packet stays in this
+    # list until the caller consumes its bytes.
+    def scan(self):
+        buffer = self.buffer
+        while self.pending and self.pending[0][0] < buffer.readPos:
+            self.pending.popleft()
+
+        pos = max(self.scanPos, buffer.readPos)
+        while True:
+            idX = buffer.find(MAGIC_WORD, pos - buffer.readPos)
+            if idX < 0:
+                # The last bytes may hold the beginning of a magic word
+                pos = max(pos, buffer.writePos - len(MAGIC_WORD) + 1)
+                break
+            start = buffer.readPos + idX
+            if start + FRAME_HEADER_DTYPE.itemsize > buffer.writePos:
+                pos = start
+                break
+            totalPacketLen = int(
+                parseFrameHeader(buffer.peek(FRAME_HEADER_DTYPE.itemsize, idX))[
+                    "totalPacketLen"
+                ]
+            )
+            # A length that can never fit means this was not a real header
+            if not FRAME_HEADER_DTYPE.itemsize <= totalPacketLen <= buffer.capacity:
+                pos = start + 1
+                continue
+            # A magic word inside the packet means bytes of it were lost and
+            # the next packet starts there. The partial packet is skipped.
+            innerFrom = start + len(MAGIC_WORD)
+            if start == self.partialStart:
+                innerFrom = max(innerFrom, self.partialScanned)
+            inner = buffer.find(
+                MAGIC_WORD, innerFrom - buffer.readPos, idX + totalPacketLen
+            )
+            if inner >= 0:
+                pos = buffer.readPos + inner
+                continue
+            if start + totalPacketLen > buffer.writePos:
+                # Wait for the rest, the next scan resumes the inner search
+                # where this one stopped
+                self.partialStart = start
+                self.partialScanned = max(
+                    innerFrom, buffer.writePos - len(MAGIC_WORD) + 1
+                )
+                pos = start
+                break
+            if self.pending:
+                # The caller consumes the bytes between two packets
+                last, lastLen = self.pending[-1]
+                self.skippedBytes += start - (last + lastLen)
+            self.pending.append((start, totalPacketLen))
+            pos = start + totalPacketLen
+        self.scanPos = pos
+
+        # Drop the bytes in front of the first packet, or everything already
+        # scanned when no packet is pending
+        keepFrom = self.pending[0][0] if self.pending else self.scanPos
+        if keepFrom > buffer.readPos:
+            self.skippedBytes += keepFrom - buffer.readPos
+            buffer.consume(keepFrom - buffer.readPos)
+
+        return [(start - buffer.readPos, length) for start, length in self.pending]
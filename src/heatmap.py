@@ -0,0 +1,125 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from numba import njit
+from scipy import sparse
+
+cache_path = Path(__file__).parent.parent / ".cache"
+
+
+# Sparse operator resampling the flipped range-azimuth heatmap (numRangeBins
+# rows, numAngleBins - 1 columns) onto a gridSize x gridSize Cartesian grid
+# spanning x in [-range_width, range_width] and y in [0, range_depth]:
+#
+#   zi = (op @ fliplrQQ.ravel()).reshape(len(ylin), len(xlin))
+#
+# Column j of fliplrQQ is the angle with sin(theta) = (j - numAngleBins/2 + 1)
+# * 2/numAngleBins, row i the range i * rangeIdxToMeters. Every pixel is a
+# bilinear blend of its 4 neighbours in (range, sin(theta)); pixels outside
+# the measured fan are 0.
+def buildAzimuthGridOperator(
+    numRangeBins, rangeIdxToMeters, numAngleBins, range_width, range_depth, gridSize
+):
+    xlin = np.linspace(-range_width, range_width, gridSize)
+    ylin = np.linspace(0, range_depth, gridSize)
+    x, y = np.meshgrid(xlin, ylin)
+    x, y = x.ravel(), y.ravel()
+
+    r = np.hypot(x, y)
+    sin_theta = np.divide(x, r, out=np.zeros_like(r), where=r > 0)
+    numCols = numAngleBins - 1
+
+    # Fractional row (range) and column (angle) of each pixel
+    ri = r / rangeIdxToMeters
+    ci = sin_theta * numAngleBins / 2 + numAngleBins / 2 - 1
+    inside = (ri <= numRangeBins - 1) & (ci >= 0) & (ci <= numCols - 1)
+
+    pixels = np.flatnonzero(inside)
+    ri, ci = ri[inside], ci[inside]
+    r0 = np.minimum(np.floor(ri).astype(np.int64), numRangeBins - 2)
+    c0 = np.minimum(np.floor(ci).astype(np.int64), numCols - 2)
+    fr, fc = ri - r0, ci - c0
+
+    rows, cols, weights = [], [], []
+    for dr, dc, w in (
+        (0, 0, (1 - fr) * (1 - fc)),
+        (0, 1, (1 - fr) * fc),
+        (1, 0, fr * (1 - fc)),
+        (1, 1, fr * fc),
+    ):
+        rows.append(pixels)
+        cols.append((r0 + dr) * numCols + c0 + dc)
+        weights.append(w)
+
+    op = sparse.csr_matrix(
+        (
+            np.concatenate(weights).astype(np.float32),
+            (np.concatenate(rows), np.concatenate(cols)),
+        ),
+        shape=(gridSize * gridSize, numRangeBins * numCols),
+    )
+    op.sum_duplicates()
+    op.eliminate_zeros()
+    return xlin, ylin, op
+
+
+# Returns (xlin, ylin, op) for the given geometry. The operator is built once
+# per key and stored under .cache/, so it is not rebuilt at each startup.
+@lru_cache(maxsize=8)
+def azimuthGridOperator(
+    numRangeBins,
+    rangeIdxToMeters,
+    numAngleBins,
+    range_width,
+    range_depth,
+    gridSize=100,
+):
+    key = (numRangeBins, rangeIdxToMeters, numAngleBins, range_width, range_depth)
+    digest = hashlib.sha1(repr(key + (gridSize,)).encode()).hexdigest()[:16]
+    filename = cache_path / f"azimuth_{digest}.npz"
+    xlin = np.linspace(-range_width, range_width, gridSize)
+    ylin = np.linspace(0, range_depth, gridSize)
+
+    try:
+        return xlin, ylin, sparse.load_npz(filename).tocsr()
+    except (OSError, ValueError):
+        pass
+
+    xlin, ylin, op = buildAzimuthGridOperator(
+        numRangeBins, rangeIdxToMeters, numAngleBins, range_width, range_depth, gridSize
+    )
+    try:
+        cache_path.mkdir(exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp = filename.with_suffix(".tmp.npz")
+        sparse.save_npz(tmp, op)
+        tmp.replace(filename)
+    except OSError as e:
+        print(f"Could not cache the azimuth grid operator: {e}")
+    return xlin, ylin, op
+
+
+# Decode the range-Doppler heatmap TLV straight into out, a preallocated
+# (numDopplerBins, numRangeBins) array. The payload holds little-endian
+# uint16 values range-major (all Doppler bins of range bin 0 first); the
+# Doppler axis is fftshifted so zero velocity sits in the middle row.
+@njit(cache=True, nogil=True)
+def decodeRangeDoppler(payload, offset, out):
+    numDopplerBins, numRangeBins = out.shape
+    half = numDopplerBins // 2
+    k = offset
+    for r in range(numRangeBins):
+        for d in range(numDopplerBins):
+            out[(d - half) % numDopplerBins, r] = np.uint16(payload[k]) | (
+                np.uint16(payload[k + 1]) << np.uint16(8)
+            )
+            k += 2
+
+
+# Compile decodeRangeDoppler for out's layout, or load it from numba's
+# cache, by decoding an all-zero payload. This takes a few hundred ms, which
+# is better spent when a configuration is applied than on its first frame.
+def warmRangeDoppler(out):
+    decodeRangeDoppler(np.zeros(2 * out.size, dtype=np.uint8), 0, out)
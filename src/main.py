@@ -4,6 +4,7 @@ from threading import Thread, Event, Lock
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import messagebox
+from tkinter import simpledialog
 from tkinter import ttk
 from ttkthemes import ThemedTk
 
@@ -17,6 +18,12 @@ from msgspec.json import decode
 
 from pathlib import Path
 
+from frame import AZIMUTH_GRID_SIZE
+from frameindex import FrameIndex
+from netframes import DEFAULT_PORT, NetFrameSubscriber
+from sharedframes import SharedFrameSubscriber
+from tlv import MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP
+
 assets_path = Path(__file__).parent.parent / "assets"
 data_path = Path(__file__).parent.parent / "data"
 
@@ -43,17 +50,21 @@ class ReadDataThread(Thread):
             print(f"An error occurred: {e}")
 
         self.lock = Lock()
+        # Built on the first seek()
+        self.index = None
         self.x_coord = []
         self.y_coord = []
         self.rp_y = []
         self.noiserp_y = []
         self.doppz = [[]]
+        # Only live frames carry the azimuth heatmap
+        self.zi = np.zeros((1, 1), np.float32)
 
     def run(self):
         while not self._stop_event.is_set():
             if not self.paused.is_set():
-                data = decode(self.file.readline(), type=Schema)
                 with self.lock:
+                    data = decode(self.file.readline(), type=Schema)
                     self.x_coord[:] = data.x_coord
                     self.y_coord[:] = data.y_coord
                     self.rp_y[:] = data.rp_y
@@ -67,9 +78,17 @@ class ReadDataThread(Thread):
             self.file.close()
             self.file = None
 
+    # Continue playback from frame n
+    def seek(self, n):
+        with self.lock:
+            if self.index is None:
+                self.index = FrameIndex(self.file.name)
+            self.index.seek(self.file, n)
+
     def change_file_path(self, file_path):
         self.paused.set()
         self._close_file()
+        self.index = None
         try:
             self.file = open(file_path, "rb")
         except Exception as e:
@@ -82,6 +101,80 @@ class ReadDataThread(Thread):
         self._close_file()
 
 
+# Shows the newest live frame, polled every interval seconds. framePeriod
+# is the time between the frames received last, the plots redraw at that
+# rate (see sync_animation_interval). connect()
+# returns a subscriber: sharedframes.SharedFrameSubscriber for
+# only_read.py --share on this machine (the default) or
+# netframes.NetFrameSubscriber for only_read.py --publish. Same attributes
+# as ReadDataThread, so the plots do not care which one is running.
+class LiveDataThread(Thread):
+    def __init__(self, connect=SharedFrameSubscriber, interval=0.02):
+        super().__init__()
+        self.daemon = True
+
+        self.paused = Event()
+        self._stop_event = Event()
+
+        self.connect = connect
+        self.interval = interval
+        self.framePeriod = None
+        self._lastTimestamp = None
+        self.subscriber = None
+        self.lock = Lock()
+        self.x_coord = []
+        self.y_coord = []
+        self.rp_y = []
+        self.noiserp_y = []
+        self.doppz = [[]]
+        # Only live frames carry the azimuth heatmap
+        self.zi = np.zeros((1, 1), np.float32)
+
+    def _attach(self):
+        if self.subscriber is not None:
+            if not self.subscriber.closed():
+                return True
+            # Republished with a new configuration, or disconnected
+            self.subscriber.close()
+            self.subscriber = None
+        try:
+            self.subscriber = self.connect()
+        except OSError:
+            return False
+        return True
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if not self.paused.is_set() and self._attach():
+                latest = self.subscriber.latest()
+                if latest is not None:
+                    frame, points = latest
+                    timestamp = float(frame["timestamp"])
+                    if (
+                        self._lastTimestamp is not None
+                        and timestamp > self._lastTimestamp
+                    ):
+                        self.framePeriod = timestamp - self._lastTimestamp
+                    self._lastTimestamp = timestamp
+                    with self.lock:
+                        self.x_coord[:] = points["x"]
+                        self.y_coord[:] = points["y"]
+                        self.rp_y[:] = frame["rp"]
+                        self.noiserp_y[:] = frame["noiserp"]
+                        self.doppz[:] = frame["rangeDoppler"]
+                        if show_azimuth and frame["tlvMask"] & (
+                            1 << MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP
+                        ):
+                            self.zi = frame["zi"]
+            self._stop_event.wait(timeout=self.interval)
+        if self.subscriber is not None:
+            self.subscriber.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
 class ConfigureFrame(ttk.Frame):
     def __init__(self, container):
         super().__init__(container)
@@ -264,7 +357,10 @@ class ConfigureFrame(ttk.Frame):
         )
         self._range_azimuth_heat_map = tk.BooleanVar()
         ttk.Checkbutton(
-            plot, text="Range Azimuth Heat Map", variable=self._range_azimuth_heat_map
+            plot,
+            text="Range Azimuth Heat Map",
+            variable=self._range_azimuth_heat_map,
+            command=self.toggle_azimuth,
         ).grid(row=0, column=1, sticky=tk.W)
         self._range_doppler_heat_map = tk.BooleanVar()
         ttk.Checkbutton(
@@ -280,6 +376,8 @@ class ConfigureFrame(ttk.Frame):
 
         buttons.columnconfigure(0, weight=1)
         buttons.columnconfigure(1, weight=1)
+        buttons.columnconfigure(2, weight=1)
+        buttons.columnconfigure(3, weight=1)
         usefile_btn = ttk.Button(
             buttons, text="RERUN PRELOADED ITERATION", command=self.read_and_graph_file
         )
@@ -288,20 +386,66 @@ class ConfigureFrame(ttk.Frame):
             buttons, text="SEND CONFIG TO MMWAVE DEVICE", command=self.send_config
         )
         send_btn.grid(column=1, row=0, padx=10, pady=10, sticky=tk.E)
+        live_btn = ttk.Button(buttons, text="SHOW LIVE DATA", command=self.show_live)
+        live_btn.grid(column=2, row=0, padx=10, pady=10, sticky=tk.E)
+        remote_btn = ttk.Button(
+            buttons, text="CONNECT TO PUBLISHER", command=self.show_remote
+        )
+        remote_btn.grid(column=3, row=0, padx=10, pady=10, sticky=tk.E)
 
         for widget in buttons.winfo_children():
             widget.grid(padx=5, pady=5)
 
+    # The live frames carry the azimuth heatmap when the configuration
+    # enables it, only_read.py computes it for --share and --publish
+    def toggle_azimuth(self):
+        global show_azimuth
+        show_azimuth = self._range_azimuth_heat_map.get()
+
     def read_and_graph_file(self):
         global read_data
         read_data.paused.set()
         file_path = filedialog.askopenfilename()
         if file_path:
-            read_data.change_file_path(file_path)
+            if isinstance(read_data, LiveDataThread):
+                read_data.stop()
+                read_data = ReadDataThread(file_path)
+                read_data.start()
+                set_noise_ylim(150)
+            else:
+                read_data.change_file_path(file_path)
             read_data.paused.clear()
         else:
             messagebox.showerror("Error", "Select A File")
 
+    # Plot the frames only_read.py --share publishes instead of a file
+    def show_live(self):
+        self._show_live(SharedFrameSubscriber)
+
+    # Plot the frames an only_read.py --publish sends, possibly from another
+    # machine
+    def show_remote(self):
+        address = simpledialog.askstring(
+            "Publisher", "host:port", initialvalue=f"localhost:{DEFAULT_PORT}"
+        )
+        if not address:
+            return
+        host, _, port = address.rpartition(":")
+        try:
+            port = int(port)
+        except ValueError:
+            messagebox.showerror("Error", "Expected host:port")
+            return
+        self._show_live(lambda: NetFrameSubscriber(host, port))
+
+    def _show_live(self, connect):
+        global read_data
+        read_data.stop()
+        read_data = LiveDataThread(connect)
+        read_data.start()
+        # The live profiles are the raw Q9 log2 magnitudes
+        set_noise_ylim(65535)
+
     def send_config(self):
         global read_data
         read_data.paused.set()
@@ -339,20 +483,16 @@ class PlotFrame(ttk.Frame):
         toolbar_dop = NavigationToolbar2Tk(canvas_dop, self, pack_toolbar=False)
         toolbar_dop.update()
 
-        toolbar_dop.grid(
-            row=3,
-            column=0,
-            columnspan=2,
-            sticky=tk.EW,
-            padx=self.winfo_screenwidth() // 4,
-        )
-        canvas_dop.get_tk_widget().grid(
-            row=2,
-            column=0,
-            columnspan=2,
-            sticky=tk.NSEW,
-            padx=self.winfo_screenwidth() // 4,
-        )
+        toolbar_dop.grid(row=3, column=0, sticky=tk.EW)
+        canvas_dop.get_tk_widget().grid(row=2, column=0, sticky=tk.NSEW)
+
+        canvas_azi = FigureCanvasTkAgg(fig_azi, self)
+        canvas_azi.draw()
+        toolbar_azi = NavigationToolbar2Tk(canvas_azi, self, pack_toolbar=False)
+        toolbar_azi.update()
+
+        toolbar_azi.grid(row=3, column=1, sticky=tk.EW)
+        canvas_azi.get_tk_widget().grid(row=2, column=1, sticky=tk.NSEW)
 
 
 class App(ThemedTk):
@@ -387,6 +527,9 @@ class App(ThemedTk):
         notebook.add(frameplt, text="Plots")
 
 
+# Set by the Range Azimuth Heat Map checkbox
+show_azimuth = False
+
 read_data = ReadDataThread("../data/CCW_A_1.json")
 read_data.start()
 read_data.paused.set()
@@ -429,6 +572,29 @@ def animate_dop(_):
     return (im,)
 
 
+# Graph for the range-azimuth heatmap, on only_read.py's Cartesian grid
+# (x in [-range_width, range_width], y in [0, range_depth])
+fig_azi = Figure(figsize=(8, 6))
+ax_azi = fig_azi.add_subplot(111)
+ax_azi.set_title("Range Azimuth")
+im_azi = ax_azi.imshow(
+    np.zeros((AZIMUTH_GRID_SIZE, AZIMUTH_GRID_SIZE), np.float32),
+    aspect="auto",
+    origin="lower",
+    cmap="viridis",
+    animated=True,
+)
+ax_azi.tick_params(left=False, bottom=False, labelleft=False, labelbottom=False)
+
+
+def animate_azi(_):
+    if show_azimuth and not read_data.paused.is_set():
+        zi = read_data.zi
+        im_azi.set_clim(np.amin(zi), np.amax(zi))
+        im_azi.set_data(zi)
+    return (im_azi,)
+
+
 # Graph for noise profile
 fig_noise = Figure(figsize=(8, 6))
 ax_noise = fig_noise.add_subplot(111, xlim=(1, 256), ylim=(0, 150))
@@ -438,30 +604,58 @@ ax_noise.set_ylabel("dB")
 (obj_rp,) = ax_noise.plot([], [])
 (obj_noiserp,) = ax_noise.plot([], [])
 ax_noise.legend([obj_rp, obj_noiserp], ["rp_y", "noiserp_y"])
-noise_xaxis = np.arange(256) + 1
+
+
+def set_noise_ylim(top):
+    ax_noise.set_ylim(0, top)
+    fig_noise.canvas.draw_idle()
 
 
 def animate_noise(_):
     if not read_data.paused.is_set():
+        # The number of range bins depends on the configuration
+        noise_xaxis = np.arange(len(read_data.rp_y)) + 1
         obj_rp.set_data(noise_xaxis, read_data.rp_y)
         obj_noiserp.set_data(noise_xaxis, read_data.noiserp_y)
     return (obj_rp, obj_noiserp)
 
 
+# Redraw every PLAYBACK_INTERVAL ms when playing a file, at the frame rate
+# (but no faster than the live data is polled) when showing live frames
+PLAYBACK_INTERVAL = 400
+
+
+def sync_animation_interval():
+    interval = PLAYBACK_INTERVAL
+    if isinstance(read_data, LiveDataThread) and read_data.framePeriod:
+        interval = max(read_data.framePeriod, read_data.interval) * 1000
+    for anim in (anim_pos, anim_dop, anim_noise, anim_azi):
+        anim.event_source.interval = int(interval)
+    app.after(1000, sync_animation_interval)
+
+
 app = App()
 
 anim_pos = FuncAnimation(
-    fig_pos, animate_pos, interval=400, blit=True, cache_frame_data=False
+    fig_pos, animate_pos, interval=PLAYBACK_INTERVAL, blit=True, cache_frame_data=False
 )
 anim_dop = FuncAnimation(
     fig_dop,
     animate_dop,
-    interval=400,
+    interval=PLAYBACK_INTERVAL,
     blit=True,
     cache_frame_data=False,
 )
 anim_noise = FuncAnimation(
-    fig_noise, animate_noise, interval=400, blit=True, cache_frame_data=False
+    fig_noise,
+    animate_noise,
+    interval=PLAYBACK_INTERVAL,
+    blit=True,
+    cache_frame_data=False,
+)
+anim_azi = FuncAnimation(
+    fig_azi, animate_azi, interval=PLAYBACK_INTERVAL, blit=True, cache_frame_data=False
 )
 
+sync_animation_interval()
 app.mainloop()
@@ -0,0 +1,258 @@
+import socket
+import struct
+import time
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+
+import numpy as np
+from msgspec import DecodeError, Struct
+from msgspec.msgpack import Decoder, Encoder
+
+from recording import POINT_DTYPE, fillRecord, frameDtype
+from serialreader import LatencyStats
+
+# Parsed frames over TCP to any number of subscribers, e.g. a viewer on
+# another machine:
+#
+#   python only_read.py --publish 5555
+#
+# Every message is a 4-byte little-endian length followed by a msgpack
+# encoded FrameMessage. The arrays travel as their raw bytes: frame is one
+# recording.frameDtype record and points are POINT_DTYPE records, so the
+# receiving side only needs np.frombuffer.
+
+DEFAULT_PORT = 5555
+
+_LENGTH = struct.Struct("<I")
+
+
+class FrameMessage(Struct, array_like=True):
+    frameNumber: int
+    timestamp: float
+    numRangeBins: int
+    numDopplerBins: int
+    frame: bytes
+    points: bytes
+    # Side of the azimuth heatmap in frame, 0 without it
+    gridSize: int = 0
+
+
+# Sends the queued messages of one subscriber. A subscriber that cannot keep
+# up loses messages (counted in droppedFrames) instead of slowing down the
+# publisher or the other subscribers. One that stops reading altogether is
+# disconnected once a send has been blocked for sendTimeout seconds, as the
+# stream cannot be resumed after a partial message.
+class _SubscriberThread(Thread):
+    def __init__(self, connection, address, maxFrames, sendTimeout):
+        super().__init__()
+        self.daemon = True
+
+        self.connection = connection
+        self.connection.settimeout(sendTimeout)
+        self.address = address
+        self.messages = Queue(maxsize=maxFrames)
+        # Time from publish() to the message being handed to the socket
+        self.latency = LatencyStats()
+        self.sentFrames = 0
+        self.droppedFrames = 0
+        self.connected = True
+
+    def put(self, queuedAt, message):
+        try:
+            self.messages.put_nowait((queuedAt, message))
+        except Full:
+            self.droppedFrames += 1
+
+    def run(self):
+        while self.connected:
+            try:
+                queuedAt, message = self.messages.get(timeout=0.5)
+            except Empty:
+                continue
+            if message is None:
+                break
+            try:
+                self.connection.sendall(message)
+            except OSError:
+                break
+            self.latency.add(time.perf_counter() - queuedAt)
+            self.sentFrames += 1
+        self.connected = False
+        self.connection.close()
+
+    # Stop without waiting for the queued messages to be sent. Shutting the
+    # socket down wakes a thread blocked in sendall.
+    def stop(self, timeout=1.0):
+        self.connected = False
+        while True:
+            try:
+                self.messages.get_nowait()
+            except Empty:
+                break
+        try:
+            self.messages.put_nowait((None, None))
+        except Full:
+            pass
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.join(timeout)
+
+    def __str__(self):
+        return (
+            f"{self.address[0]}:{self.address[1]}: {self.sentFrames} sent, "
+            f"{self.droppedFrames} dropped, send {self.latency}"
+        )
+
+
+class NetFramePublisher(Thread):
+    def __init__(self, port=DEFAULT_PORT, host="", maxFrames=16, sendTimeout=2.0):
+        super().__init__()
+        self.daemon = True
+
+        self._stop_event = Event()
+
+        self.maxFrames = maxFrames
+        self.sendTimeout = sendTimeout
+        self.server = socket.create_server((host, port))
+        self.server.settimeout(0.5)
+        self.port = self.server.getsockname()[1]
+        self.subscribers = []
+        self.lock = Lock()
+        self.encoder = Encoder()
+        self._records = {}
+
+    # Accept subscribers until stopped
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                connection, address = self.server.accept()
+            except TimeoutError:
+                continue
+            except OSError:
+                break
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = _SubscriberThread(
+                connection, address, self.maxFrames, self.sendTimeout
+            )
+            subscriber.start()
+            with self.lock:
+                self.subscribers.append(subscriber)
+
+    def _record(self, numRangeBins, numDopplerBins, gridSize):
+        # Reused for every frame of the same layout
+        key = (numRangeBins, numDopplerBins, gridSize)
+        if key not in self._records:
+            self._records[key] = np.zeros(1, dtype=frameDtype(*key))
+        record = self._records[key]
+        record[...] = 0
+        return record
+
+    # Send a frame.Frame to every subscriber
+    def publish(self, frame):
+        with self.lock:
+            self.subscribers = [s for s in self.subscribers if s.connected]
+            subscribers = list(self.subscribers)
+        if not subscribers:
+            return
+
+        record = self._record(frame.numRangeBins, frame.numDopplerBins, frame.gridSize)
+        points = fillRecord(record[0], frame)
+        payload = self.encoder.encode(
+            FrameMessage(
+                frame.frameNumber,
+                frame.timestamp,
+                frame.numRangeBins,
+                frame.numDopplerBins,
+                record.tobytes(),
+                points.tobytes(),
+                frame.gridSize,
+            )
+        )
+        message = _LENGTH.pack(len(payload)) + payload
+
+        queuedAt = time.perf_counter()
+        for subscriber in subscribers:
+            subscriber.put(queuedAt, message)
+
+    def stop(self):
+        self._stop_event.set()
+        self.server.close()
+        self.join()
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.stop()
+
+    def __str__(self):
+        with self.lock:
+            lines = [str(s) for s in self.subscribers]
+        return "\n".join(
+            [f"publisher on port {self.port}: {len(lines)} subscribers"] + lines
+        )
+
+
+def _recv_exactly(connection, n):
+    data = bytearray(n)
+    view = memoryview(data)
+    while view:
+        received = connection.recv_into(view)
+        if not received:
+            raise ConnectionError("publisher closed the connection")
+        view = view[received:]
+    return data
+
+
+# Keeps the newest frame received from a NetFramePublisher. Same interface
+# as sharedframes.SharedFrameSubscriber: latest() returns (frame, points) or
+# None, closed() turns True once the connection is gone.
+class NetFrameSubscriber(Thread):
+    def __init__(self, host="localhost", port=DEFAULT_PORT):
+        super().__init__()
+        self.daemon = True
+
+        self.connection = socket.create_connection((host, port))
+        self.decoder = Decoder(FrameMessage)
+        self.lock = Lock()
+        self._latest = None
+        self._closed = False
+        self.receivedFrames = 0
+        # Frames received while nobody called latest()
+        self.skippedFrames = 0
+        self.start()
+
+    def run(self):
+        try:
+            while True:
+                (length,) = _LENGTH.unpack(_recv_exactly(self.connection, 4))
+                message = self.decoder.decode(_recv_exactly(self.connection, length))
+                dtype = frameDtype(
+                    message.numRangeBins, message.numDopplerBins, message.gridSize
+                )
+                frame = np.frombuffer(message.frame, dtype=dtype)[0]
+                points = np.frombuffer(message.points, dtype=POINT_DTYPE)
+                with self.lock:
+                    if self._latest is not None:
+                        self.skippedFrames += 1
+                    self._latest = (frame, points)
+                    self.receivedFrames += 1
+        except (OSError, DecodeError):
+            pass
+        self._closed = True
+
+    def closed(self):
+        return self._closed
+
+    def latest(self):
+        with self.lock:
+            latest, self._latest = self._latest, None
+        return latest
+
+    def close(self):
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+        self.join()
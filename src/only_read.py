@@ -1,10 +1,9 @@
 import argparse
 import csv
-import math
+import json
 import os
 import time
 from inspect import trace
-from operator import add
 from time import sleep
 from turtle import pd
 
@@ -17,9 +16,39 @@ from dotenv import load_dotenv
 from scipy.fftpack import fft
 # smooth
 
+from clisession import CliSession, readCommands
+from csvsession import AXES, axesPath
+from csvwriter import CsvWriterThread
+from frame import Frame, azimuthGridSize
+from framesync import FrameSync
+from heatmap import azimuthGridOperator, decodeRangeDoppler, warmRangeDoppler
+from recording import RecordingWriter
+from ringbuffer import RingBuffer
+from serialreader import SerialReaderThread
+from netframes import NetFramePublisher
+from radarconfig import loadConfig
+from rawcapture import RawCaptureWriter
+from sharedframes import SharedFramePublisher
+from stagestats import PipelineStats
+from tlv import (
+    MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP,
+    MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO,
+    MMWDEMO_OUTPUT_MSG_NOISE_PROFILE,
+    MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP,
+    MMWDEMO_OUTPUT_MSG_STATS,
+    MMWDEMO_UART_MSG_DETECTED_POINTS,
+    MMWDEMO_UART_MSG_RANGE_PROFILE,
+    decodeDetectedPoints,
+    decodeFrame,
+    decodePointCloud,
+    decodeProfile,
+    decodeSideInfo,
+    decodeStatistics,
+    sdkMajorVersion,
+)
+
 load_dotenv(".env")
 os_name = os.environ.get("OS")
-framePeriodicity = 0
 configs = {
     "pointcloud": "Configurations/pointcloud_configuration.cfg",
     "macro": "Configurations/macro_5fps.cfg",
@@ -28,10 +57,24 @@ configs = {
 #configFileName = configs["pointcloud"]
 # CLIport = {}
 # Dataport = {}
-byteBuffer = np.zeros(2**15, dtype="uint8")
-byteBufferLength = 0
-rangeAzimuthHeatMapGridInit = 0
+# Resized for the configuration by configureBuffer
+byteBuffer = RingBuffer(2**15)
+frameSync = FrameSync(byteBuffer)
+# Packets the byte buffer can hold at once
+IN_FLIGHT_PACKETS = 4
+# Seconds the board may take to acknowledge a configuration command
+CLI_TIMEOUT = 1.0
 xlin, ylin = [], []
+# Reused for every packet, see configFrame
+frame = None
+csvWriter = None
+recordingWriter = None
+sharedFrames = None
+netFrames = None
+rawCapture = None
+# Timestamp of the frames being parsed, replays use the capture's time
+frameClock = time.time
+pipelineStats = PipelineStats()
 NUM_ANGLE_BINS = 64
 range_depth = 10
 range_width = 5
@@ -62,22 +105,64 @@ header = [
     "interChirpProcessingMargin",
     "activeFrameCPULoad",
     "interFrameCPULoad",
+    # SDK 3.x side info of the points
+    "snr",
+    "noise",
 ]
 
 
-def file_create():
+def file_stem():
     filename = os.path.abspath("")
     if os_name == "Windows_NT":
         filename += time.strftime("\%Y%m%d_%H%M%S")
     elif os_name == "Ubuntu":
         filename += time.strftime("/%Y%m%d_%H%M%S")
-    filename += ".csv"
+    return filename
+
+
+# The rangeArray and dopplerArray columns stay empty, the axes of the
+# configuration are written once to <name>.csv.axes.json instead
+def file_create(configParameters):
+    filename = file_stem() + ".csv"
     with open(filename, "w") as f:
         csv.DictWriter(f, fieldnames=header).writeheader()
+    axes_write(filename, configParameters)
 
     return filename
 
 
+def axes_write(filename, configParameters):
+    with open(axesPath(filename), "w") as f:
+        json.dump({name: configParameters[name] for name in AXES}, f)
+
+
+# Binary recording (see recording.py) next to where the CSV would go
+def recording_create(configParameters):
+    return RecordingWriter(file_stem() + ".mmw", configParameters)
+
+
+def rawcapture_create(configFileName):
+    return RawCaptureWriter(file_stem() + ".uart", configFileName)
+
+
+# Store the loss counters of the session recorded to filename and start new
+# ones. Binary recordings keep them in their header, CSV recordings in a
+# <name>.loss.json file next to them.
+def recording_close_session(filename):
+    loss = pipelineStats.loss
+    if csvWriter is not None:
+        loss.writerDroppedFrames = csvWriter.droppedFrames
+        csvWriter.droppedFrames = 0
+    if recordingWriter is not None:
+        recordingWriter.update_header(loss=loss.as_dict())
+    else:
+        with open(str(filename) + ".loss.json", "w") as f:
+            json.dump(loss.as_dict(), f, indent=2)
+    if not loss.lossless():
+        print(f"{filename}: {loss}")
+    pipelineStats.reset()
+
+
 # ------------------------------------------------------------------
 
 
@@ -91,8 +176,14 @@ def serialConfig(configFileName):
     Dataport = ""
     # Open the serial ports for the configuration and the data ports
 
+    # Any other device, e.g. the pty pair of a stand-in device. Checked
+    # first so the board's ports are not opened as well.
+    if os.environ.get("CLI_PORT"):
+        CLIport = serial.Serial(os.environ["CLI_PORT"], 115200)
+        Dataport = serial.Serial(os.environ["DATA_PORT"], 921600)
+
     # Raspberry pi
-    if os_name == "Ubuntu":
+    elif os_name == "Ubuntu":
         CLIport = serial.Serial("/dev/ttyACM0", 115200)
         Dataport = serial.Serial("/dev/ttyACM1", 921600)
 
@@ -100,12 +191,13 @@ def serialConfig(configFileName):
         CLIport = serial.Serial("COM6", 115200)
         Dataport = serial.Serial("COM9", 921600)
 
-    # Read the configuration file and send it to the board
-    config = [line.rstrip("\r\n") for line in open(configFileName)]
-    for i in config:
-        print(i)
-        CLIport.write((i + "\n").encode())
-        time.sleep(0.01)
+    # Send the configuration file to the board, each command once the
+    # previous one is acknowledged. A rejected command raises CliError.
+    session = CliSession(CLIport, timeout=CLI_TIMEOUT)
+    start = time.perf_counter()
+    for result in session.iter_run(readCommands(configFileName)):
+        print(result)
+    print(f"configured in {(time.perf_counter() - start) * 1e3:.1f} ms")
 
     return CLIport, Dataport
 
@@ -113,555 +205,370 @@ def serialConfig(configFileName):
 # ------------------------------------------------------------------
 
 
-# Function to parse the data inside the configuration file
+# Function to parse the data inside the configuration file. The parsed
+# configuration is cached by file content (see radarconfig.py), callers get
+# their own copy of the parameters.
 def parseConfigFile(configFileName):
-    global framePeriodicity
-    configParameters = (
-        {}
-    )  # Initialize an empty dictionary to store the configuration parameters
-
-    # Read the configuration file and send it to the board
-    config = [line.rstrip("\r\n") for line in open(configFileName)]
-    for i in config:
-        # Split the line
-        splitWords = i.split(" ")
-
-        # Hard code the number of antennas, change if other configuration is used
-        numRxAnt = 6
-        numTxAnt = 2
-
-        # Get the information about the profile configuration
-        if "profileCfg" in splitWords[0]:
-            startFreq = int(float(splitWords[2]))
-            idleTime = int(splitWords[3])
-            rampEndTime = float(splitWords[5])
-            freqSlopeConst = float(splitWords[8])
-            numAdcSamples = int(splitWords[10])
-            numAdcSamplesRoundTo2 = 1
-
-            while numAdcSamples > numAdcSamplesRoundTo2:
-                numAdcSamplesRoundTo2 = numAdcSamplesRoundTo2 * 2
-
-            digOutSampleRate = int(splitWords[11])
-
-        # Get the information about the frame configuration
-        elif "frameCfg" in splitWords[0]:
-            chirpStartIdx = int(splitWords[1])
-            chirpEndIdx = int(splitWords[2])
-            numLoops = int(splitWords[3])
-            numFrames = int(splitWords[4])
-            framePeriodicity = int(float(splitWords[5]))
-
-    # Combine the read data to obtain the configuration parameters
-    numChirpsPerFrame = (chirpEndIdx - chirpStartIdx + 1) * numLoops
-    configParameters["numDopplerBins"] = numChirpsPerFrame / numTxAnt
-    configParameters["numRangeBins"] = numAdcSamplesRoundTo2
-    configParameters["rangeResolutionMeters"] = (3e8 * digOutSampleRate * 1e3) / (
-        2 * freqSlopeConst * 1e12 * numAdcSamples
-    )
-    configParameters["rangeIdxToMeters"] = (3e8 * digOutSampleRate * 1e3) / (
-        2 * freqSlopeConst * 1e12 * configParameters["numRangeBins"]
-    )
-    configParameters["dopplerResolutionMps"] = 3e8 / (
-        2
-        * startFreq
-        * 1e9
-        * (idleTime + rampEndTime)
-        * 1e-6
-        * configParameters["numDopplerBins"]
-        * numTxAnt
-    )
-    configParameters["maxRange"] = (300 * 0.9 * digOutSampleRate) / (
-        2 * freqSlopeConst * 1e3
-    )
-    configParameters["maxVelocity"] = 3e8 / (
-        4 * startFreq * 1e9 * (idleTime + rampEndTime) * 1e-6 * numTxAnt
-    )
-
-    return configParameters
+    return loadConfig(configFileName).parameters()
 
 
 # ------------------------------------------------------------------
 
-# Helper methods for processing
-
-
-def tensor_f(vec1, vec2):
-    t = []
-    for r in range(0, len(vec1)):
-        t.append(np.multiply(np.array(vec2), vec1[r]))
-    return t
 
-
-def meshgrid(xvec, yvec):
-    x = []
-    y = []
-    for r in range(0, len(yvec)):
-        for c in range(0, len(xvec)):
-            x.append(xvec[c])
-            y.append(yvec[r])
-    return [x, y]
-
-
-def reshape_rowbased(vec, rows, cols):
-    t = []
-    start = 0
-    for r in range(0, rows):
-        row = vec[start : start + cols]
-        t.append(row)
-        start += cols
-    return t
+# Size the byte buffer for IN_FLIGHT_PACKETS of the largest packet the
+# configuration produces. It is only reallocated when that size changes.
+def configureBuffer(configParameters):
+    global byteBuffer, frameSync
+    capacity = max(2**15, IN_FLIGHT_PACKETS * configParameters["maxPacketLen"])
+    if capacity != byteBuffer.capacity:
+        byteBuffer = RingBuffer(capacity)
+        frameSync = FrameSync(byteBuffer)
+    else:
+        # Bytes of the previous configuration are of no use
+        byteBuffer.clear()
+        frameSync.reset()
+    # The frame of the configuration, with its heatmap kernel and
+    # resampling operator ready
+    frame = configFrame(configParameters)
+    warmRangeDoppler(frame.rangeDoppler)
+    if frame.gridSize:
+        azimuthOperator(configParameters, frame.gridSize)
 
 
 def change_conf_callback():
-    global CLIport, Dataport, configParameters, configFileName, byteBuffer, byteBufferLength
-    byteBuffer = np.zeros(2**15, dtype="uint8")
-    byteBufferLength = 0
+    global CLIport, Dataport, configParameters, configFileName, sharedFrames, rawCapture
     print(
         "############################ changing configuration to macro ##########################"
     )
     time.sleep(2)
     configFileName = "Configurations/macro_7fps.cfg"
-    CLIport, Dataport = serialConfig(configFileName)
     configParameters = parseConfigFile(configFileName)
+    configureBuffer(configParameters)
+    CLIport, Dataport = serialConfig(configFileName)
+    # Viewers reattach to the new layout when they see the old one closed
+    if sharedFrames is not None:
+        sharedFrames.close()
+        sharedFrames = SharedFramePublisher(configParameters)
+    # A capture holds the bytes of one configuration
+    if rawCapture is not None:
+        rawCapture.close()
+        rawCapture = rawcapture_create(configFileName)
 
 
-def processDetectedPoints(byteBuffer, idX, configParameters):
+def processDetectedPoints(byteBuffer, idX, frame, configParameters):
     global configFileName
 
-    # word array to convert 4 bytes to a 16-bit number
-    word = [1, 2**8]
-    tlv_numObj = np.matmul(byteBuffer[idX : idX + 2], word)
-    idX += 2
-    tlv_xyzQFormat = 2 ** np.matmul(byteBuffer[idX : idX + 2], word)
-    idX += 2
-
-    # Initialize the arrays
-    rangeIdx = np.zeros(tlv_numObj, dtype="int16")
-    dopplerIdx = np.zeros(tlv_numObj, dtype="int16")
-    peakVal = np.zeros(tlv_numObj, dtype="int16")
-    x = np.zeros(tlv_numObj, dtype="int16")
-    y = np.zeros(tlv_numObj, dtype="int16")
-    z = np.zeros(tlv_numObj, dtype="int16")
-
-    for objectNum in range(tlv_numObj):
-        # Read the data for each object
-        rangeIdx[objectNum] = np.matmul(byteBuffer[idX : idX + 2], word)
-        idX += 2
-        dopplerIdx[objectNum] = np.matmul(byteBuffer[idX : idX + 2], word)
-        idX += 2
-        peakVal[objectNum] = np.matmul(byteBuffer[idX : idX + 2], word)
-        idX += 2
-        x[objectNum] = np.matmul(byteBuffer[idX : idX + 2], word)
-        idX += 2
-        y[objectNum] = np.matmul(byteBuffer[idX : idX + 2], word)
-        idX += 2
-        z[objectNum] = np.matmul(byteBuffer[idX : idX + 2], word)
-        idX += 2
+    objects, tlv_xyzQFormat = decodeDetectedPoints(byteBuffer, idX)
+    tlv_numObj = len(objects)
+    tlv_xyzQFormat = 2**tlv_xyzQFormat
+
+    points = frame.resize_points(tlv_numObj)
+    points["rangeIdx"] = objects["rangeIdx"]
+    points["dopplerIdx"] = objects["dopplerIdx"]
+    points["peakVal"] = objects["peakVal"]
+    dopplerIdx = points["dopplerIdx"]
 
     # Make the necessary corrections and calculate the rest of the data
-    rangeVal = rangeIdx * configParameters["rangeIdxToMeters"]
-    dopplerIdx[dopplerIdx > (configParameters["numDopplerBins"] / 2 - 1)] = (
-        dopplerIdx[dopplerIdx > (configParameters["numDopplerBins"] / 2 - 1)] - 65535
+    points["range"] = points["rangeIdx"] * configParameters["rangeIdxToMeters"]
+    # dopplerIdx is already signed. Indices past the last positive bin are
+    # unsigned bin numbers of negative velocities.
+    half = int(configParameters["numDopplerBins"]) // 2
+    dopplerIdx[dopplerIdx >= half] -= 2 * half
+    points["doppler"] = dopplerIdx * configParameters["dopplerResolutionMps"]
+    points["x"] = objects["x"] / tlv_xyzQFormat
+    points["y"] = objects["y"] / tlv_xyzQFormat
+    points["z"] = objects["z"] / tlv_xyzQFormat
+    frame.mark(MMWDEMO_UART_MSG_DETECTED_POINTS)
+
+
+# SDK 3.x detected points: float coordinates and radial velocity, the bin
+# indices are derived from them and there is no peak value
+def processPointCloud(byteBuffer, idX, tlv_length, frame, configParameters):
+    cloud = decodePointCloud(byteBuffer, idX, tlv_length)
+
+    points = frame.resize_points(len(cloud))
+    points["x"] = cloud["x"]
+    points["y"] = cloud["y"]
+    points["z"] = cloud["z"]
+    points["doppler"] = cloud["velocity"]
+    points["range"] = np.sqrt(cloud["x"] ** 2 + cloud["y"] ** 2 + cloud["z"] ** 2)
+    points["rangeIdx"] = np.rint(points["range"] / configParameters["rangeIdxToMeters"])
+    points["dopplerIdx"] = np.rint(
+        cloud["velocity"] / configParameters["dopplerResolutionMps"]
     )
-    dopplerVal = dopplerIdx * configParameters["dopplerResolutionMps"]
-    x = x / tlv_xyzQFormat
-    y = y / tlv_xyzQFormat
-    z = z / tlv_xyzQFormat
-
-    # Store the data in the detObj dictionary
-    detObj = {
-        "numObj": tlv_numObj,
-        "rangeIdx": list(rangeIdx),
-        "range": list(rangeVal),
-        "dopplerIdx": list(dopplerIdx),
-        "doppler": list(dopplerVal),
-        "peakVal": list(peakVal),
-        "x": list(x),
-        "y": list(y),
-        "z": list(z),
-    }
-    return detObj
-
-
-def processRangeNoiseProfile(byteBuffer, idX, detObj, configParameters, isRangeProfile):
+    points["peakVal"] = 0
+    frame.mark(MMWDEMO_UART_MSG_DETECTED_POINTS)
+
+
+# SNR and noise of the points of the preceding point cloud TLV
+def processSideInfo(byteBuffer, idX, tlv_length, frame):
+    sideInfo = decodeSideInfo(byteBuffer, idX, tlv_length)
+    points = frame.points
+    numObj = min(len(points), len(sideInfo))
+    for name in ("snr", "noise"):
+        points[name] = 0
+        points[name][:numObj] = sideInfo[name][:numObj]
+    frame.mark(MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO)
+
+
+def processRangeNoiseProfile(byteBuffer, idX, frame, configParameters, isRangeProfile):
     traceidX = 0
     if isRangeProfile:
         traceidX = 0
     else:
         traceidX = 2
     numrp = 2 * configParameters["numRangeBins"]
-    rp = byteBuffer[idX : idX + numrp]
-
-    rp = list(map(add, rp[0:numrp:2], list(map(lambda x: 256 * x, rp[1:numrp:2]))))
-    rp_x = (
-        np.array(range(configParameters["numRangeBins"]))
-        * configParameters["rangeIdxToMeters"]
-    )
+    rp = decodeProfile(byteBuffer, idX, configParameters["numRangeBins"])
     idX += numrp
     if traceidX == 0:
-        noiseObj = {"rp": rp}
-        return noiseObj
+        frame.rp[:] = rp
+        frame.mark(MMWDEMO_UART_MSG_RANGE_PROFILE)
     elif traceidX == 2:
-        noiseObj = {"noiserp": rp}
-        return noiseObj
-
-
-def processAzimuthHeatMap(byteBuffer, idX, configParameters):
-    numTxAnt = 2
-    numRxAnt = 4
-    numBytes = numRxAnt * numTxAnt * configParameters["numRangeBins"] * 4
-    q = byteBuffer[idX : idX + numBytes]
-    idX += numBytes
-    q_rows = numTxAnt * numRxAnt
-    q_cols = configParameters["numRangeBins"]
-    q_idx = 0
-    QQ = []
-    NUM_ANGLE_BINS = 64
-    for i in range(0, q_cols):
-        real = np.zeros(NUM_ANGLE_BINS)
-        img = np.zeros(NUM_ANGLE_BINS)
-        for j in range(0, q_rows):
-            real[j] = q[q_idx + 1] * 256 + q[q_idx]
-            if real[j] > 32767:
-                real[j] = real[j] - 65536
-            img[j] = q[q_idx + 3] * 256 + q[q_idx + 2]
-            if img[j] > 32767:
-                img[j] = img[j] - 65536
-            q_idx = q_idx + 4
-        fft.transform(real, img)
-        for ri in range(0, NUM_ANGLE_BINS):
-            real[ri] = int(math.sqrt(real[ri] * real[ri] + img[ri] * img[ri]))
-
-        QQ.append(
-            [
-                y
-                for x in [
-                    real[int(NUM_ANGLE_BINS / 2) :],
-                    real[0 : int(NUM_ANGLE_BINS / 2)],
-                ]
-                for y in x
-            ]
-        )
-    fliplrQQ = []
-    for tmpr in range(0, len(QQ)):
-        fliplrQQ.append(QQ[tmpr][1:].reverse())
-    global rangeAzimuthHeatMapGridInit
-    if rangeAzimuthHeatMapGridInit == 0:
-        angles_rad = np.multiply(
-            np.arange(-NUM_ANGLE_BINS / 2 + 1, NUM_ANGLE_BINS / 2, 1),
-            2 / NUM_ANGLE_BINS,
-        )
-        theta = []
-        for ang in angles_rad:
-            theta.append(math.asin(ang))
-        range_val = np.multiply(
-            np.arange(0, configParameters["numRangeBins"], 1),
-            configParameters["rangeIdxToMeters"],
-        )
-        sin_theta = []
-        cos_theta = []
-        for t in theta:
-            sin_theta.append(math.sin(t))
-            cos_theta.append(math.cos(t))
-        posX = tensor_f(range_val, sin_theta)
-        posY = tensor_f(range_val, cos_theta)
-
-        global xlin, ylin
-        xlin = np.arange(-range_width, range_width, 2 * range_width / 99)
-        if len(xlin) < 100:
-            xlin = np.append(xlin, range_width)
-        ylin = np.arange(0, range_depth, 1.0 * range_depth / 99)
-        if len(ylin) < 100:
-            ylin = np.append(ylin, range_depth)
-
-        xiyi = meshgrid(xlin, ylin)
-        rangeAzimuthHeatMapGridInit = 1
-
-    zi = fliplrQQ
-    zi = reshape_rowbased(zi, len(ylin), len(xlin))
-    heatObj = {"zi": zi}
-    return heatObj
-
-
-def processRangeDopplerHeatMap(byteBuffer, idX):
-    # Get the number of bytes to read
-    numBytes = (
-        int(configParameters["numDopplerBins"])
-        * int(configParameters["numRangeBins"])
-        * 2
+        frame.noiserp[:] = rp
+        frame.mark(MMWDEMO_OUTPUT_MSG_NOISE_PROFILE)
+
+
+def azimuthOperator(configParameters, gridSize):
+    return azimuthGridOperator(
+        configParameters["numRangeBins"],
+        configParameters["rangeIdxToMeters"],
+        NUM_ANGLE_BINS,
+        range_width,
+        range_depth,
+        gridSize,
     )
-    # Convert the raw data to int16 array
-    payload = byteBuffer[idX : idX + numBytes]
-    idX += numBytes
-    # rangeDoppler = math.add(
-    #     math.subset(rangeDoppler, math.index(math.range(0, numBytes, 2))),
-    #     math.multiply(math.subset(rangeDoppler, math.index(math.range(1, numBytes, 2))), 256)
-    # );
-
-    rangeDoppler = list(
-        map(
-            add,
-            payload[0:numBytes:2],
-            list(map(lambda x: 256 * x, payload[1:numBytes:2])),
-        )
-    )  # wrong implementation. Need to update the range doppler at range index
-
-    # rangeDoppler = payload.view(dtype=np.int16)
-    # Some frames have strange values, skip those frames
-    # TO DO: Find why those strange frames happen
-    # if np.max(rangeDoppler) > 10000:
-    #     return 0
-
-    # Convert the range doppler array to a matrix
-    rangeDoppler = np.reshape(
-        rangeDoppler,
-        (int(configParameters["numDopplerBins"]), configParameters["numRangeBins"]),
-        "F",
-    )  # Fortran-like reshape
-    rangeDoppler = np.append(
-        rangeDoppler[int(len(rangeDoppler) / 2) :],
-        rangeDoppler[: int(len(rangeDoppler) / 2)],
-        axis=0,
+
+
+# Range-azimuth heatmap resampled onto the Cartesian xlin/ylin grid of
+# frame.zi
+def processAzimuthHeatMap(byteBuffer, idX, frame, configParameters):
+    numVirtAnt = configParameters["numVirtualAntennas"]
+    numRangeBins = configParameters["numRangeBins"]
+
+    # One complex int16 (real, imag) sample per range bin and virtual antenna
+    q = np.frombuffer(
+        byteBuffer, dtype="<i2", count=2 * numVirtAnt * numRangeBins, offset=idX
     )
+    q = q.reshape(numRangeBins, 2 * numVirtAnt).astype(np.float32).view(np.complex64)
+
+    # Zero-padded angle FFT over the antennas of every range bin at once
+    QQ = np.fft.fftshift(np.abs(fft(q, NUM_ANGLE_BINS, axis=1)), axes=1)
+    fliplrQQ = QQ[:, :0:-1]
+
+    # Resample onto the Cartesian xlin/ylin grid with the cached operator
+    global xlin, ylin
+    xlin, ylin, gridOperator = azimuthOperator(configParameters, frame.gridSize)
+    frame.zi[...] = (gridOperator @ fliplrQQ.ravel()).reshape(len(ylin), len(xlin))
+    frame.mark(MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP)
+
 
-    dopplerM = []
-    rangeDoppler_list = list(rangeDoppler)
-    for e in rangeDoppler_list:
-        dopplerM.append(list(e))
+def processRangeDopplerHeatMap(byteBuffer, idX, frame):
+    # The range and doppler axes are the configuration's (rangeArray and
+    # dopplerArray of configParameters), frames only carry the heatmap
+    decodeRangeDoppler(byteBuffer, idX, frame.rangeDoppler)
+    frame.mark(MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP)
 
-    #
-    # # Generate the range and doppler arrays for the plot
-    rangeArray = (
-        np.array(range(configParameters["numRangeBins"]))
-        * configParameters["rangeIdxToMeters"]
+
+def processStatistics(byteBuffer, idX, frame):
+    frame.stats[...] = decodeStatistics(byteBuffer, idX)
+    frame.mark(MMWDEMO_OUTPUT_MSG_STATS)
+
+
+# The Frame the packets of this configuration are parsed into, reused from
+# packet to packet
+def configFrame(configParameters):
+    global frame
+    shape = (
+        int(configParameters["numRangeBins"]),
+        int(configParameters["numDopplerBins"]),
+        azimuthGridSize(configParameters),
     )
-    dopplerArray = np.multiply(
-        np.arange(
-            -configParameters["numDopplerBins"] / 2,
-            configParameters["numDopplerBins"] / 2,
-        ),
-        configParameters["dopplerResolutionMps"],
-    )  # This is dopplermps from js.
-    dopplerObj = {
-        "rangeDoppler": dopplerM,
-        "rangeArray": list(rangeArray),
-        "dopplerArray": list(dopplerArray),
-    }
-    return dopplerObj
-
-
-def processStatistics(byteBuffer, idX):
-    word = [1, 2**8, 2**16, 2**24]
-    interFrameProcessingTime = np.matmul(byteBuffer[idX : idX + 4], word)
-    idX += 4
-    transmitOutputTime = np.matmul(byteBuffer[idX : idX + 4], word)
-    idX += 4
-    interFrameProcessingMargin = np.matmul(byteBuffer[idX : idX + 4], word)
-    idX += 4
-    interChirpProcessingMargin = np.matmul(byteBuffer[idX : idX + 4], word)
-    idX += 4
-    activeFrameCPULoad = np.matmul(byteBuffer[idX : idX + 4], word)
-    idX += 4
-
-    interFrameCPULoad = np.matmul(byteBuffer[idX : idX + 4], word)
-    idX += 4
-
-    statisticsObj = {
-        "interFrameProcessingTime": interFrameProcessingTime,
-        "transmitOutputTime": transmitOutputTime,
-        "interFrameProcessingMargin": interFrameProcessingMargin,
-        "interChirpProcessingMargin": interChirpProcessingMargin,
-        "activeFrameCPULoad": activeFrameCPULoad,
-        "interFrameCPULoad": interFrameCPULoad,
-    }
-    return statisticsObj
-
-
-def buffer_flush(idX, byteBufferLength, totalPacketLen):
-    if 0 < idX < byteBufferLength:
-        shiftSize = totalPacketLen
-
-        byteBuffer[: byteBufferLength - shiftSize] = byteBuffer[
-            shiftSize:byteBufferLength
-        ]
-        byteBuffer[byteBufferLength - shiftSize :] = np.zeros(
-            len(byteBuffer[byteBufferLength - shiftSize :]), dtype="uint8"
-        )
-        byteBufferLength = byteBufferLength - shiftSize
+    if frame is None or (
+        frame.numRangeBins,
+        frame.numDopplerBins,
+        frame.gridSize,
+    ) != shape:
+        frame = Frame(shape[0], shape[1], gridSize=shape[2])
+    return frame
+
+
+# Parse one complete packet (header and TLVs) into the reused Frame. The
+# frame is only valid until the next packet is parsed.
+def parsePacket(packet, configParameters):
+    frame = configFrame(configParameters)
+
+    # Read the header and the TLV headers
+    frameHeader, tlvs = decodeFrame(packet)
+    # The detected points layout changed with SDK 3
+    sdkVersion = sdkMajorVersion(frameHeader["version"])
+    frameNumber = int(frameHeader["frameNumber"])
+    frame.reset(frameNumber, frameClock())
+    pipelineStats.loss.add_frame(frameNumber)
+    if len(tlvs) < int(frameHeader["numTLVs"]):
+        pipelineStats.loss.truncatedFrames += 1
+    # Read the TLV messages
+    for tlv_type, idX, tlv_length in tlvs:
+        start = time.perf_counter_ns()
+        # Read the data depending on the TLV message
+        if tlv_type == MMWDEMO_UART_MSG_DETECTED_POINTS:
+            if sdkVersion >= 3:
+                processPointCloud(packet, idX, tlv_length, frame, configParameters)
+            else:
+                processDetectedPoints(packet, idX, frame, configParameters)
+        elif tlv_type == MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO:
+            processSideInfo(packet, idX, tlv_length, frame)
+        elif tlv_type == MMWDEMO_UART_MSG_RANGE_PROFILE:
+            processRangeNoiseProfile(
+                packet, idX, frame, configParameters, isRangeProfile=True
+            )
+        elif tlv_type == MMWDEMO_OUTPUT_MSG_NOISE_PROFILE:
+            processRangeNoiseProfile(
+                packet, idX, frame, configParameters, isRangeProfile=False
+            )
+        elif tlv_type == MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP:
+            # Only the live viewers show the heatmap, the CSV and the
+            # recordings do not store it
+            if sharedFrames is not None or netFrames is not None:
+                processAzimuthHeatMap(packet, idX, frame, configParameters)
+        elif tlv_type == MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP:
+            processRangeDopplerHeatMap(packet, idX, frame)
+        elif tlv_type == MMWDEMO_OUTPUT_MSG_STATS:
+            processStatistics(packet, idX, frame)
+
+        # except Error as e:
+        #     pass
+        pipelineStats.add_tlv(tlv_type, tlv_length, time.perf_counter_ns() - start)
+    pipelineStats.add_frame()
+
+    return frameNumber, frame
+
+
+def writeRow(filename, frame):
+    start = time.perf_counter_ns()
+    _writeRow(filename, frame)
+    pipelineStats.add("write", time.perf_counter_ns() - start)
+    if sharedFrames is not None:
+        start = time.perf_counter_ns()
+        sharedFrames.publish(frame)
+        pipelineStats.add("share", time.perf_counter_ns() - start)
+    if netFrames is not None:
+        start = time.perf_counter_ns()
+        netFrames.publish(frame)
+        pipelineStats.add("publish", time.perf_counter_ns() - start)
+
+
+def _writeRow(filename, frame):
+    if recordingWriter is not None:
+        recordingWriter.write(frame)
+        return
+    # Hand the row to the background writer when one is running
+    if csvWriter is not None:
+        csvWriter.put(frame)
+        return
+    with open(filename, "a") as f:
+        writer = csv.DictWriter(f, header)
+        writer.writerow(frame.row())
+
+
+# Move whatever the data port has received into the buffer, the read is
+# dropped if the buffer is full
+def readData(Dataport):
+    start = time.perf_counter_ns()
+    readBuffer = Dataport.read(Dataport.in_waiting)
+    if not byteBuffer.write(readBuffer):
+        pipelineStats.loss.overflowBytes += len(readBuffer)
+    pipelineStats.add("read", time.perf_counter_ns() - start)
+    captureChunk(time.time(), readBuffer)
+
+
+# Keep the bytes as read, including those the buffer had no room for
+def captureChunk(timestamp, readBuffer):
+    if rawCapture is None or not readBuffer:
+        return
+    start = time.perf_counter_ns()
+    rawCapture.write(timestamp, readBuffer)
+    pipelineStats.add("capture", time.perf_counter_ns() - start)
 
-        # Check that there are no errors with the buffer length
-        if byteBufferLength < 0:
-            byteBufferLength = 0
+
+def scanFrames():
+    start = time.perf_counter_ns()
+    skippedBytes = frameSync.skippedBytes
+    frames = frameSync.scan()
+    pipelineStats.loss.resyncBytes += frameSync.skippedBytes - skippedBytes
+    pipelineStats.add("sync", time.perf_counter_ns() - start)
+    return frames
 
 
 def readAndParseData16xx(Dataport, configParameters, filename):
-    global byteBuffer, byteBufferLength, framePeriodicity, changes_happening, change_conf, configFileName
-    finalObj = {"Date": time.strftime("%d/%m/%Y"), "Time": time.strftime("%H%M%S")}
-    # Constants
-    OBJ_STRUCT_SIZE_BYTES = 12
-    BYTE_VEC_ACC_MAX_SIZE = 2**15
-    MMWDEMO_UART_MSG_DETECTED_POINTS = 1
-    MMWDEMO_UART_MSG_RANGE_PROFILE = 2
-    MMWDEMO_OUTPUT_MSG_NOISE_PROFILE = 3
-    MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP = 4
-    MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP = 5
-    MMWDEMO_OUTPUT_MSG_STATS = 6
-    maxBufferSize = 2**15
-    magicWord = [2, 1, 4, 3, 6, 5, 8, 7]
+    global byteBuffer, frameSync, changes_happening, change_conf, configFileName
+    frame = None
 
     # Initialize variables
     magicOK = 0  # Checks if magic number has been read
     dataOK = 0  # Checks if the data has been read correctly
     frameNumber = 0
-    detObj = {}
-    tlv_type = 0
 
-    readBuffer = Dataport.read(Dataport.in_waiting)
-    byteVec = np.frombuffer(readBuffer, dtype="uint8")
-    byteCount = len(byteVec)
-    # Check that the buffer is not full, and then add the data to the buffer
-    if (byteBufferLength + byteCount) < maxBufferSize:
-        byteBuffer[byteBufferLength : byteBufferLength + byteCount] = byteVec[
-            :byteCount
-        ]
-        byteBufferLength = byteBufferLength + byteCount
-
-    # Check that the buffer has some data
-    if byteBufferLength > 16:
-        # Check for all possible locations of the magic word
-        possibleLocs = np.where(byteBuffer == magicWord[0])[0]
-
-        # Confirm that is the beginning of the magic word and store the index in startIdx
-        startIdx = []
-        for loc in possibleLocs:
-            check = byteBuffer[loc : loc + 8]
-            if np.all(check == magicWord):
-                startIdx.append(loc)
-
-        # Check that startIdx is not empty
-        if startIdx:
-            # Remove the data before the first start index
-            if 0 < startIdx[0] < byteBufferLength:
-                byteBuffer[: byteBufferLength - startIdx[0]] = byteBuffer[
-                    startIdx[0] : byteBufferLength
-                ]
-                byteBuffer[byteBufferLength - startIdx[0] :] = np.zeros(
-                    len(byteBuffer[byteBufferLength - startIdx[0] :]), dtype="uint8"
-                )
-                byteBufferLength = byteBufferLength - startIdx[0]
-
-            # Check that there have no errors with the byte buffer length
-            if byteBufferLength < 0:
-                byteBufferLength = 0
-
-            # word array to convert 4 bytes to a 32-bit number
-            word = [1, 2**8, 2**16, 2**24]
+    readData(Dataport)
 
-            # Read the total packet length
-            totalPacketLen = np.matmul(byteBuffer[12 : 12 + 4], word)
-
-            # Check that all the packet has been read
-            if (byteBufferLength >= totalPacketLen) and (byteBufferLength != 0):
-                magicOK = 1
+    # Look for complete packets in the bytes that arrived since the last call
+    frames = scanFrames()
+    if frames:
+        startIdx, totalPacketLen = frames[0]
+        magicOK = 1
 
     # If magicOK is equal to 1 then process the message
     if magicOK:
-        # word array to convert 4 bytes to a 32-bit number
-        word = [1, 2**8, 2**16, 2**24]
-
-        # Initialize the pointer index
-        idX = 0
-
-        # Read the header
-        magicNumber = byteBuffer[idX : idX + 8]
-        idX += 8
-        version = format(np.matmul(byteBuffer[idX : idX + 4], word), "x")
-        idX += 4
-        totalPacketLen = np.matmul(byteBuffer[idX : idX + 4], word)
-        idX += 4
-        platform = format(np.matmul(byteBuffer[idX : idX + 4], word), "x")
-        idX += 4
-        frameNumber = np.matmul(byteBuffer[idX : idX + 4], word)
-        idX += 4
-        timeCpuCycles = np.matmul(byteBuffer[idX : idX + 4], word)
-        idX += 4
-        numDetectedObj = np.matmul(byteBuffer[idX : idX + 4], word)
-        idX += 4
-        numTLVs = np.matmul(byteBuffer[idX : idX + 4], word)
-        idX += 4
-        subFrameNumber = np.matmul(byteBuffer[idX : idX + 4], word)
-        idX += 4
-        # Read the TLV messages
-        for tlvIdx in range(numTLVs):
-            # word array to convert 4 bytes to a 32 bit number
-            word = [1, 2**8, 2**16, 2**24]
-            # print("tlvIdx:", tlvIdx, "numTLVs:", numTLVs, "\n")
-            # Check the header of the TLV message
-            tlv_type = np.matmul(byteBuffer[idX : idX + 4], word)
-            idX += 4
-            tlv_length = np.matmul(byteBuffer[idX : idX + 4], word)
-            idX += 4
-            # Read the data depending on the TLV message
-            if tlv_type == MMWDEMO_UART_MSG_DETECTED_POINTS:
-                print("CASE 1 ","tlv_type:", tlv_type , "MMWDEMO_UART_MSG_DETECTED_POINTS"  , MMWDEMO_UART_MSG_DETECTED_POINTS , "\n")
-                detObj = processDetectedPoints(byteBuffer, idX, configParameters)
-                # print(detObj,"\n")
-                finalObj.update(detObj)
-                
-
-            elif tlv_type == MMWDEMO_UART_MSG_RANGE_PROFILE:
-                print("CASE 2 ","tlv_type:", tlv_type , "MMWDEMO_UART_MSG_RANGE_PROFILE"  , MMWDEMO_UART_MSG_RANGE_PROFILE , "\n")
-                noiseObj = processRangeNoiseProfile(
-                    byteBuffer, idX, detObj, configParameters, isRangeProfile=True
-                )
-                # print(noiseObj,"\n")
-                finalObj.update(noiseObj)
-            elif tlv_type == MMWDEMO_OUTPUT_MSG_NOISE_PROFILE:
-                print("CASE 3 ","tlv_type:", tlv_type , "MMWDEMO_OUTPUT_MSG_NOISE_PROFILE"  , MMWDEMO_OUTPUT_MSG_NOISE_PROFILE , "\n")
-                noiseObj = processRangeNoiseProfile(
-                    byteBuffer, idX, detObj, configParameters, isRangeProfile=False
-                )
-                # print(noiseObj,"\n")
-                finalObj.update(noiseObj)
-            elif tlv_type == MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP:
-                print("CASE 4 ","tlv_type:", tlv_type , "MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP"  , MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP , "\n")
-                heatObj = processAzimuthHeatMap(byteBuffer, idX, configParameters)
-                # finalObj.update(heatObj)
-            elif tlv_type == MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP:
-                print("CASE 5 ","tlv_type:", tlv_type , "MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP"  , MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP , "\n")
-                dopplerObj = processRangeDopplerHeatMap(byteBuffer, idX)
-                # print(dopplerObj,"\n")
-                finalObj.update(dopplerObj)
-            elif tlv_type == MMWDEMO_OUTPUT_MSG_STATS:
-                print("CASE 6 ","tlv_type:", tlv_type , "MMWDEMO_OUTPUT_MSG_STATS"  , MMWDEMO_OUTPUT_MSG_STATS , "\n")
-                statisticsObj = processStatistics(byteBuffer, idX)
-                # finalObj.update(statisticsObj)
-
-            idX += tlv_length
-            # except Error as e:
-            #     pass
+        # Contiguous view of the packet, valid until it is consumed
+        packet = byteBuffer.peek(totalPacketLen, startIdx)
+        frameNumber, frame = parsePacket(packet, configParameters)
+        writeRow(filename, frame)
         # Remove already processed data
-        with open(filename, "a") as f:
-            writer = csv.DictWriter(f, header)
-            writer.writerow(finalObj)
-        if 0 < idX < byteBufferLength:
-            shiftSize = totalPacketLen
-
-            byteBuffer[: byteBufferLength - shiftSize] = byteBuffer[
-                shiftSize:byteBufferLength
-            ]
-            byteBuffer[byteBufferLength - shiftSize :] = np.zeros(
-                len(byteBuffer[byteBufferLength - shiftSize :]), dtype="uint8"
-            )
-            byteBufferLength = byteBufferLength - shiftSize
-
-            # Check that there are no errors with the buffer length
-            if byteBufferLength < 0:
-                byteBufferLength = 0
-                # this is to print final obj
-    print(finalObj)
-    return dataOK, frameNumber, finalObj
+        byteBuffer.consume(startIdx + totalPacketLen)
+    return dataOK, frameNumber, frame
+
+
+# Parse and write every complete packet already in the buffer. Yields
+# (frameNumber, frame) per packet, the frame being reused for the next one.
+def parseBufferedFrames(configParameters, filename):
+    consumed = 0
+    for startIdx, totalPacketLen in scanFrames():
+        # Offsets are relative to the read position before this loop
+        startIdx -= consumed
+        packet = byteBuffer.peek(totalPacketLen, startIdx)
+        frameNumber, frame = parsePacket(packet, configParameters)
+        writeRow(filename, frame)
+        byteBuffer.consume(startIdx + totalPacketLen)
+        consumed += startIdx + totalPacketLen
+        yield frameNumber, frame
+
+
+# Drain mode: read once, then parse every complete packet that is already
+# buffered, so a host that fell behind catches up instead of letting the
+# buffer overflow.
+def drainFrames(Dataport, configParameters, filename):
+    readData(Dataport)
+    yield from parseBufferedFrames(configParameters, filename)
+
+
+# Reader thread mode: wait up to one frame period for chunks from the
+# SerialReaderThread and parse the packets each of them completes, recording
+# the time from the chunk's arrival to the end of parsing.
+def readerFrames(reader, configParameters, filename):
+    for receivedAt, readBuffer in reader.get_chunks(reader.Dataport.timeout):
+        start = time.perf_counter_ns()
+        if not byteBuffer.write(readBuffer):
+            pipelineStats.loss.overflowBytes += len(readBuffer)
+        pipelineStats.add("read", time.perf_counter_ns() - start)
+        pipelineStats.loss.readerDroppedBytes = reader.droppedBytes
+        captureChunk(time.time() - (time.perf_counter() - receivedAt), readBuffer)
+        for frameNumber, frame in parseBufferedFrames(configParameters, filename):
+            reader.latency.add(time.perf_counter() - receivedAt)
+            yield frameNumber, frame
+
+
+def printStats(interval):
+    if pipelineStats.print_every(interval) and netFrames is not None:
+        print(netFrames)
 
 
 def parseArg():
@@ -672,6 +579,50 @@ def parseArg():
         default="pointcloud",
         choices=["pointcloud", "macro", "micro"],
     )
+    parser.add_argument(
+        "--drain",
+        help="Parse every buffered packet before sleeping",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--format",
+        help="Recording format, binary is the memory-mappable format of recording.py",
+        default="csv",
+        choices=["csv", "binary"],
+    )
+    parser.add_argument(
+        "--reader",
+        help="Read the data port from a blocking reader thread instead of polling",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--stats",
+        help="Print pipeline timing statistics every STATS seconds, 0 to disable",
+        type=float,
+        default=10,
+    )
+    parser.add_argument(
+        "--verbose",
+        help="Print every parsed frame",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--share",
+        help="Publish parsed frames to live viewers through shared memory",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--publish",
+        help="Stream parsed frames to subscribers on this TCP port (see netframes.py)",
+        type=int,
+        metavar="PORT",
+    )
+    parser.add_argument(
+        "--capture",
+        help="Also keep the raw data port bytes in <timestamp>.uart for replay "
+        "(see rawcapture.py)",
+        action="store_true",
+    )
     args = parser.parse_args()
     print(f"args %%%%%%%%%%%% {args.conf}")
     return args
@@ -683,33 +634,88 @@ def parseArg():
 if __name__ == "__main__":
     args = parseArg()
     configFileName = configs[args.conf]
-    CLIport, Dataport = serialConfig(configFileName)
-    # Get the configuration parameters from the configuration file
+    # Get the configuration parameters from the configuration file, and get
+    # ready to parse before the sensor starts sending
     configParameters = parseConfigFile(configFileName)
+    configureBuffer(configParameters)
+    CLIport, Dataport = serialConfig(configFileName)
     # print(configParameters)
 
     # Main loop
     detObj = {}
     frameData = {}
     currentIndex = 0
-    filename = file_create()
+    if args.format == "binary":
+        recordingWriter = recording_create(configParameters)
+        filename = recordingWriter.path
+    else:
+        filename = file_create(configParameters)
+        csvWriter = CsvWriterThread(filename, header)
+        csvWriter.start()
+
+    if args.share:
+        sharedFrames = SharedFramePublisher(configParameters)
+    if args.publish is not None:
+        netFrames = NetFramePublisher(args.publish)
+        netFrames.start()
+    if args.capture:
+        rawCapture = rawcapture_create(configFileName)
 
     linecounter = 0
 
+    if args.reader:
+        reader = SerialReaderThread(
+            Dataport,
+            configParameters["framePeriodicity"],
+            configParameters["maxPacketLen"],
+        )
+        reader.start()
+
     while True:
         linecounter += 1
         if linecounter > 1000000000:
             linecounter = 0
-            filename = file_create()
+            recording_close_session(filename)
+            if recordingWriter is not None:
+                recordingWriter.close()
+                recordingWriter = recording_create(configParameters)
+                filename = recordingWriter.path
+            else:
+                filename = file_create(configParameters)
+                csvWriter.set_file(filename)
 
         try:
-            dataOk, frameNumber, finalObj = readAndParseData16xx(
-                Dataport, configParameters, filename
-            )
-            if dataOk:
-                # Store the current frame into frameData
-                print(finalObj)
-                currentIndex += 1
+            if args.reader:
+                # Blocks until data arrives, so there is no sleep below
+                for frameNumber, frame in readerFrames(
+                    reader, configParameters, filename
+                ):
+                    currentIndex += 1
+                    if args.verbose:
+                        print(frame)
+                printStats(args.stats)
+                continue
+            if args.drain:
+                caughtUp = 0
+                for frameNumber, frame in drainFrames(
+                    Dataport, configParameters, filename
+                ):
+                    caughtUp += 1
+                    if args.verbose:
+                        print(frame)
+                currentIndex += caughtUp
+                if caughtUp > 1:
+                    print(f"caught up {caughtUp} frames, last frame {frameNumber}")
+            else:
+                dataOk, frameNumber, frame = readAndParseData16xx(
+                    Dataport, configParameters, filename
+                )
+                if dataOk:
+                    # Store the current frame into frameData
+                    currentIndex += 1
+                if args.verbose and frame is not None:
+                    print(frame)
+            printStats(args.stats)
             if args.conf == "pointcloud":
                 time.sleep(0.03)
             elif args.conf == "macro":
@@ -722,6 +728,24 @@ if __name__ == "__main__":
 
         # Stop the program and close everything if Ctrl + c is pressed
         except KeyboardInterrupt:
+            print(pipelineStats)
+            if args.reader:
+                reader.stop()
+                print(reader.latency)
+                pipelineStats.loss.readerDroppedBytes = reader.droppedBytes
+            recording_close_session(filename)
+            if sharedFrames is not None:
+                sharedFrames.close()
+            if netFrames is not None:
+                netFrames.stop()
+                print(netFrames)
+            if rawCapture is not None:
+                rawCapture.close()
+            if recordingWriter is not None:
+                recordingWriter.close()
+            else:
+                csvWriter.stop()
+                print(csvWriter)
             CLIport.write("sensorStop\n".encode())
             CLIport.close()
             Dataport.close()
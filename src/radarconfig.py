@@ -0,0 +1,408 @@
+import hashlib
+
+import numpy as np
+from msgspec import Struct, ValidationError, convert
+
+from tlv import (
+    GUI_MONITOR_TLVS,
+    MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO,
+    MMWDEMO_UART_MSG_DETECTED_POINTS,
+    TLV_NAMES,
+    maxPacketLen,
+    tlvPayloadSizes,
+)
+
+# Typed model of a .cfg file for the xWR16xx out-of-box demo (SDK 2.x).
+# Every command becomes a Struct whose fields are the command's arguments in
+# order, as in the SDK's CLI documentation:
+#
+#   config = loadConfig("Configurations/macro_5fps.cfg")
+#   config.profileCfg[0].numAdcSamples, config.numVirtualAntennas
+#
+# parameters() derives what the acquisition code needs (bins, resolutions,
+# axes, antennas, enabled TLVs and their sizes) once per configuration. Files are
+# parsed once per content, loadConfig returns the same RadarConfig for an
+# unchanged file.
+
+
+class DfeDataOutputMode(Struct, array_like=True):
+    modeType: int
+
+
+class ChannelCfg(Struct, array_like=True):
+    rxChannelEn: int
+    txChannelEn: int
+    cascading: int = 0
+
+
+class AdcCfg(Struct, array_like=True):
+    numADCBits: int
+    adcOutputFmt: int
+
+
+class AdcbufCfg(Struct, array_like=True):
+    subFrameIdx: int
+    adcOutputFmt: int
+    sampleSwap: int
+    chanInterleave: int
+    chirpThreshold: int
+
+
+class ProfileCfg(Struct, array_like=True):
+    profileId: int
+    startFreq: float  # GHz
+    idleTime: float  # us
+    adcStartTime: float  # us
+    rampEndTime: float  # us
+    txOutPower: int
+    txPhaseShifter: int
+    freqSlopeConst: float  # MHz/us
+    txStartTime: float  # us
+    numAdcSamples: int
+    digOutSampleRate: int  # ksps
+    hpfCornerFreq1: int
+    hpfCornerFreq2: int
+    rxGain: int
+
+
+class ChirpCfg(Struct, array_like=True):
+    startIdx: int
+    endIdx: int
+    profileId: int
+    startFreqVar: float
+    freqSlopeVar: float
+    idleTimeVar: float
+    adcStartTimeVar: float
+    txEnable: int
+
+
+class FrameCfg(Struct, array_like=True):
+    chirpStartIdx: int
+    chirpEndIdx: int
+    numLoops: int
+    numFrames: int
+    framePeriodicity: float  # ms
+    triggerSelect: int
+    frameTriggerDelay: float
+
+
+class LowPower(Struct, array_like=True):
+    dontCare: int
+    adcMode: int
+
+
+class GuiMonitor(Struct, array_like=True):
+    subFrameIdx: int
+    detectedObjects: int
+    logMagRange: int
+    noiseProfile: int
+    rangeAzimuthHeatMap: int
+    rangeDopplerHeatMap: int
+    statsInfo: int
+
+
+class CfarCfg(Struct, array_like=True):
+    subFrameIdx: int
+    procDirection: int
+    mode: int
+    noiseWin: int
+    guardLen: int
+    divShift: int
+    cyclicMode: int
+    thresholdScale: int
+
+
+class PeakGrouping(Struct, array_like=True):
+    subFrameIdx: int
+    scheme: int
+    inRangeDirectionEn: int
+    inDopplerDirectionEn: int
+    minRangeIndex: int
+    maxRangeIndex: int
+
+
+class MultiObjBeamForming(Struct, array_like=True):
+    subFrameIdx: int
+    enabled: int
+    threshold: float
+
+
+class ClutterRemoval(Struct, array_like=True):
+    subFrameIdx: int
+    enabled: int
+
+
+class CalibDcRangeSig(Struct, array_like=True):
+    subFrameIdx: int
+    enabled: int
+    negativeBinIdx: int
+    positiveBinIdx: int
+    numAvgChirps: int
+
+
+class ExtendedMaxVelocity(Struct, array_like=True):
+    subFrameIdx: int
+    enabled: int
+
+
+class BpmCfg(Struct, array_like=True):
+    subFrameIdx: int
+    enabled: int
+    chirp0Idx: int
+    chirp1Idx: int
+
+
+class LvdsStreamCfg(Struct, array_like=True):
+    subFrameIdx: int
+    enableHeader: int
+    dataFmt: int
+    enableSW: int
+
+
+class NearFieldCfg(Struct, array_like=True):
+    subFrameIdx: int
+    enabled: int
+    startRangeIdx: int
+    endRangeIdx: int
+
+
+# A range bias followed by one (real, imag) phase compensation pair per
+# virtual antenna, kept flat
+class CompRangeBiasAndRxChanPhase(Struct, array_like=True):
+    rangeBias: float
+    rxChPhaseComp: list[float]
+
+
+class MeasureRangeBiasAndRxChanPhase(Struct, array_like=True):
+    enabled: int
+    targetDistance: float
+    searchWin: float
+
+
+class CqRxSatMonitor(Struct, array_like=True):
+    profileIdx: int
+    satMonSel: int
+    primarySliceDuration: int
+    numSlices: int
+    rxChannelMask: int
+
+
+class CqSigImgMonitor(Struct, array_like=True):
+    profileIdx: int
+    numSlices: int
+    timeSliceNumSamples: int
+
+
+class AnalogMonitor(Struct, array_like=True):
+    rxSaturation: int
+    sigImgBand: int
+
+
+# Commands that may appear several times keep every occurrence in order,
+# the others only the last one
+REPEATED = {"profileCfg", "chirpCfg", "cfarCfg"}
+
+# Commands that change nothing in the configuration
+ACTIONS = {"sensorStop", "sensorStart", "flushCfg"}
+
+
+class RadarConfig(Struct):
+    dfeDataOutputMode: DfeDataOutputMode | None = None
+    channelCfg: ChannelCfg | None = None
+    adcCfg: AdcCfg | None = None
+    adcbufCfg: AdcbufCfg | None = None
+    profileCfg: list[ProfileCfg] = []
+    chirpCfg: list[ChirpCfg] = []
+    frameCfg: FrameCfg | None = None
+    lowPower: LowPower | None = None
+    guiMonitor: GuiMonitor | None = None
+    cfarCfg: list[CfarCfg] = []
+    peakGrouping: PeakGrouping | None = None
+    multiObjBeamForming: MultiObjBeamForming | None = None
+    clutterRemoval: ClutterRemoval | None = None
+    calibDcRangeSig: CalibDcRangeSig | None = None
+    extendedMaxVelocity: ExtendedMaxVelocity | None = None
+    bpmCfg: BpmCfg | None = None
+    lvdsStreamCfg: LvdsStreamCfg | None = None
+    nearFieldCfg: NearFieldCfg | None = None
+    compRangeBiasAndRxChanPhase: CompRangeBiasAndRxChanPhase | None = None
+    measureRangeBiasAndRxChanPhase: MeasureRangeBiasAndRxChanPhase | None = None
+    CQRxSatMonitor: CqRxSatMonitor | None = None
+    CQSigImgMonitor: CqSigImgMonitor | None = None
+    analogMonitor: AnalogMonitor | None = None
+    # Arguments of commands this model does not know
+    other: dict[str, list[str]] = {}
+
+    @property
+    def profile(self):
+        # The last one, as the original parser did
+        return self.profileCfg[-1]
+
+    @property
+    def numRxAnt(self):
+        mask = self.channelCfg.rxChannelEn if self.channelCfg else 15
+        return bin(mask).count("1")
+
+    @property
+    def numTxAnt(self):
+        mask = self.channelCfg.txChannelEn if self.channelCfg else 3
+        return bin(mask).count("1")
+
+    @property
+    def numVirtualAntennas(self):
+        return self.numRxAnt * self.numTxAnt
+
+    @property
+    def numChirpsPerFrame(self):
+        frame = self.frameCfg
+        return (frame.chirpEndIdx - frame.chirpStartIdx + 1) * frame.numLoops
+
+    @property
+    def numDopplerBins(self):
+        return self.numChirpsPerFrame // self.numTxAnt
+
+    @property
+    def numRangeBins(self):
+        # numAdcSamples rounded up to a power of 2
+        return 1 << (self.profile.numAdcSamples - 1).bit_length()
+
+    # TLV types the sensor sends, all of them without a guiMonitor command
+    @property
+    def enabledTlvs(self):
+        if self.guiMonitor is None:
+            return [tlv_type for _, tlv_type in GUI_MONITOR_TLVS]
+        return [
+            tlv_type
+            for name, tlv_type in GUI_MONITOR_TLVS
+            if getattr(self.guiMonitor, name)
+        ]
+
+    # Everything the acquisition code reads from configParameters
+    def parameters(self):
+        profile = self.profile
+        numRangeBins = self.numRangeBins
+        numDopplerBins = self.numDopplerBins
+        numTxAnt = self.numTxAnt
+        chirpTime = (profile.idleTime + profile.rampEndTime) * 1e-6
+        parameters = {
+            "numRxAnt": self.numRxAnt,
+            "numTxAnt": numTxAnt,
+            "numVirtualAntennas": self.numVirtualAntennas,
+            "numDopplerBins": numDopplerBins,
+            "numRangeBins": numRangeBins,
+            "rangeResolutionMeters": (3e8 * profile.digOutSampleRate * 1e3)
+            / (2 * profile.freqSlopeConst * 1e12 * profile.numAdcSamples),
+            "rangeIdxToMeters": (3e8 * profile.digOutSampleRate * 1e3)
+            / (2 * profile.freqSlopeConst * 1e12 * numRangeBins),
+            "dopplerResolutionMps": 3e8
+            / (2 * profile.startFreq * 1e9 * chirpTime * numDopplerBins * numTxAnt),
+            "maxRange": (300 * 0.9 * profile.digOutSampleRate)
+            / (2 * profile.freqSlopeConst * 1e3),
+            "maxVelocity": 3e8 / (4 * profile.startFreq * 1e9 * chirpTime * numTxAnt),
+            "framePeriodicity": self.frameCfg.framePeriodicity,
+            "enabledTlvs": self.enabledTlvs,
+        }
+        # Axes of the range profiles and the range-Doppler heatmap, stored
+        # once per recording rather than with every frame
+        parameters["rangeArray"] = (
+            np.arange(numRangeBins) * parameters["rangeIdxToMeters"]
+        ).tolist()
+        parameters["dopplerArray"] = (
+            np.arange(-numDopplerBins / 2, numDopplerBins / 2)
+            * parameters["dopplerResolutionMps"]
+        ).tolist()
+        if self.guiMonitor is not None:
+            parameters["guiMonitor"] = {
+                name: getattr(self.guiMonitor, name) for name, _ in GUI_MONITOR_TLVS
+            }
+        # Payload bytes of the enabled TLVs, the detected points (and their
+        # SDK 3.x side info) at most
+        sizes = tlvPayloadSizes(
+            numRangeBins, numDopplerBins, self.numVirtualAntennas
+        )
+        tlvs = list(self.enabledTlvs)
+        if MMWDEMO_UART_MSG_DETECTED_POINTS in tlvs:
+            tlvs.append(MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO)
+        parameters["tlvSizes"] = {
+            TLV_NAMES[tlv_type]: sizes[tlv_type] for tlv_type in tlvs
+        }
+        parameters["maxPacketLen"] = maxPacketLen(parameters)
+        return parameters
+
+
+COMMANDS = {
+    "dfeDataOutputMode": DfeDataOutputMode,
+    "channelCfg": ChannelCfg,
+    "adcCfg": AdcCfg,
+    "adcbufCfg": AdcbufCfg,
+    "profileCfg": ProfileCfg,
+    "chirpCfg": ChirpCfg,
+    "frameCfg": FrameCfg,
+    "lowPower": LowPower,
+    "guiMonitor": GuiMonitor,
+    "cfarCfg": CfarCfg,
+    "peakGrouping": PeakGrouping,
+    "multiObjBeamForming": MultiObjBeamForming,
+    "clutterRemoval": ClutterRemoval,
+    "calibDcRangeSig": CalibDcRangeSig,
+    "extendedMaxVelocity": ExtendedMaxVelocity,
+    "bpmCfg": BpmCfg,
+    "lvdsStreamCfg": LvdsStreamCfg,
+    "nearFieldCfg": NearFieldCfg,
+    "compRangeBiasAndRxChanPhase": CompRangeBiasAndRxChanPhase,
+    "measureRangeBiasAndRxChanPhase": MeasureRangeBiasAndRxChanPhase,
+    "CQRxSatMonitor": CqRxSatMonitor,
+    "CQSigImgMonitor": CqSigImgMonitor,
+    "analogMonitor": AnalogMonitor,
+}
+
+
+def _parseCommand(name, args):
+    if name == "compRangeBiasAndRxChanPhase":
+        args = [args[0], args[1:]]
+    elif name == "guiMonitor" and len(args) == len(GUI_MONITOR_TLVS):
+        # SDKs before 2.0 have no subframe argument
+        args = ["-1", *args]
+    return convert(args, COMMANDS[name], strict=False)
+
+
+# Parse the lines of a .cfg file. Raises ValueError for a malformed command
+# and when profileCfg or frameCfg is missing.
+def parseConfig(lines):
+    config = RadarConfig()
+    for lineNumber, line in enumerate(lines, 1):
+        words = line.split()
+        if not words or words[0].startswith("%"):
+            continue
+        name, args = words[0], words[1:]
+        if name in ACTIONS:
+            continue
+        if name not in COMMANDS:
+            config.other[name] = args
+            continue
+        try:
+            command = _parseCommand(name, args)
+        except ValidationError as e:
+            raise ValueError(f"line {lineNumber}: {line.strip()!r}: {e}") from None
+        if name in REPEATED:
+            getattr(config, name).append(command)
+        else:
+            setattr(config, name, command)
+
+    for name in ("profileCfg", "frameCfg"):
+        if not getattr(config, name):
+            raise ValueError(f"configuration has no {name}")
+    return config
+
+
+# Parsed configurations by the SHA-256 of the file content
+_cache = {}
+
+
+def loadConfig(configFileName):
+    with open(configFileName, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if digest not in _cache:
+        _cache[digest] = parseConfig(content.decode().splitlines())
+    return _cache[digest]
@@ -0,0 +1,162 @@
+import json
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from recording import memmap
+
+# Raw capture of the data port: the bytes exactly as they were read, before
+# any syncing or parsing, so a session can be parsed again by a later
+# version of the parser. A capture is a directory with
+#
+#   header.json  format version and creation time
+#   config.cfg   the configuration the board was sent
+#   chunks.bin   one CHUNK_DTYPE record per read
+#   data.bin     the bytes of all reads back to back
+#
+# ReplayPort hands a capture to the parsing code in place of the serial
+# port, see bench.py replay.
+
+CAPTURE_VERSION = 1
+
+CHUNK_DTYPE = np.dtype(
+    [
+        # time.time() of the read
+        ("timestamp", "<f8"),
+        ("offset", "<u8"),
+        ("length", "<u4"),
+    ]
+)
+
+
+class RawCaptureWriter:
+    def __init__(self, path, configFileName, bufferSize=2**20):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        headerFile = self.path / "header.json"
+        if not headerFile.exists():
+            with open(headerFile, "w") as f:
+                json.dump({"version": CAPTURE_VERSION, "created": time.time()}, f)
+        shutil.copyfile(configFileName, self.path / "config.cfg")
+
+        self.chunksFile = open(self.path / "chunks.bin", "ab", buffering=bufferSize)
+        self.dataFile = open(self.path / "data.bin", "ab", buffering=bufferSize)
+        self.size = (self.path / "data.bin").stat().st_size
+        # Reused for every chunk
+        self.record = np.zeros(1, dtype=CHUNK_DTYPE)
+
+    # Append the bytes of one read
+    def write(self, timestamp, data):
+        if not data:
+            return
+        self.record["timestamp"] = timestamp
+        self.record["offset"] = self.size
+        self.record["length"] = len(data)
+        self.dataFile.write(data)
+        self.chunksFile.write(self.record.tobytes())
+        self.size += len(data)
+
+    def flush(self):
+        # Data first, so a reader never sees a chunk without its bytes
+        self.dataFile.flush()
+        self.chunksFile.flush()
+
+    def close(self):
+        self.flush()
+        self.dataFile.close()
+        self.chunksFile.close()
+
+
+class RawCapture:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "header.json") as f:
+            self.header = json.load(f)
+        if self.header["version"] != CAPTURE_VERSION:
+            raise ValueError(f"Unsupported capture version {self.header['version']}")
+        self.configFileName = str(self.path / "config.cfg")
+        self.data = memmap(self.path / "data.bin", np.dtype("u1"))
+        chunks = memmap(self.path / "chunks.bin", CHUNK_DTYPE)
+        # Chunks whose bytes were not all written are left out
+        self.chunks = chunks[chunks["offset"] + chunks["length"] <= len(self.data)]
+
+    def __len__(self):
+        return len(self.chunks)
+
+    @property
+    def size(self):
+        if not len(self.chunks):
+            return 0
+        last = self.chunks[-1]
+        return int(last["offset"]) + int(last["length"])
+
+    @property
+    def duration(self):
+        if not len(self.chunks):
+            return 0.0
+        return float(self.chunks["timestamp"][-1] - self.chunks["timestamp"][0])
+
+
+# Stands in for the data port during a replay. As fast as possible, every
+# read returns at most the rest of the current chunk, so the parser sees
+# the reads of the session one by one and a replay always parses the same
+# way. At recorded pace (paced=True) a chunk only becomes readable once as
+# much time has passed since the start of the replay as had passed since
+# the start of the capture.
+class ReplayPort:
+    def __init__(self, capture, paced=False):
+        self.capture = capture
+        self.paced = paced
+        self.timeout = None
+        chunks = capture.chunks
+        self.ends = (chunks["offset"] + chunks["length"]).astype(np.int64)
+        self.starts = chunks["offset"].astype(np.int64)
+        self.times = chunks["timestamp"] - (chunks["timestamp"][0] if len(chunks) else 0)
+        self.position = int(self.starts[0]) if len(chunks) else 0
+        self.chunk = 0
+        self.started = time.perf_counter()
+
+    # End of the bytes that can be read now
+    def _end(self):
+        if self.chunk >= len(self.ends):
+            return self.position
+        if not self.paced:
+            return int(self.ends[self.chunk])
+        elapsed = time.perf_counter() - self.started
+        due = int(np.searchsorted(self.times, elapsed, side="right"))
+        return int(self.ends[due - 1]) if due > self.chunk else self.position
+
+    @property
+    def in_waiting(self):
+        return self._end() - self.position
+
+    # Capture time of the chunk read last, the replayed frames' timestamp
+    def time(self):
+        return float(self.capture.chunks["timestamp"][max(self.chunk - 1, 0)])
+
+    def exhausted(self):
+        return self.chunk >= len(self.ends)
+
+    def read(self, size=1):
+        end = self._end()
+        if end == self.position and self.paced and not self.exhausted():
+            # Block like a serial port until the next chunk is due
+            wait = self.times[self.chunk] - (time.perf_counter() - self.started)
+            if self.timeout is not None:
+                wait = min(wait, self.timeout)
+            time.sleep(max(wait, 0))
+            end = self._end()
+        end = min(end, self.position + size)
+        data = self.capture.data[self.position : end].tobytes()
+        self.position = end
+        while self.chunk < len(self.ends) and self.position >= self.ends[self.chunk]:
+            self.chunk += 1
+            if self.chunk < len(self.ends):
+                # Skip bytes between chunks, e.g. of an unfinished write
+                self.position = max(self.position, int(self.starts[self.chunk]))
+        return data
+
+    def close(self):
+        pass
@@ -0,0 +1,235 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from tlv import (
+    MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP,
+    MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO,
+    MMWDEMO_OUTPUT_MSG_NOISE_PROFILE,
+    MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP,
+    MMWDEMO_OUTPUT_MSG_STATS,
+    MMWDEMO_UART_MSG_RANGE_PROFILE,
+    STATS_DTYPE,
+)
+
+# Binary recording of parsed frames. A recording is a directory with
+#
+#   header.json  format version, configuration and the two dtypes below
+#   frames.bin   one fixed-size FRAME record per frame
+#   points.bin   POINT records of all frames back to back
+#
+# Both .bin files are plain arrays, so np.memmap gives frame N directly, and
+# its points are points[pointOffset : pointOffset + numObj].
+#
+# Version 2 added snr and noise to POINT_DTYPE. Version 1 recordings are
+# still read, their points without those two fields.
+
+FORMAT_VERSION = 2
+
+POINT_DTYPE = np.dtype(
+    [
+        ("rangeIdx", "<i2"),
+        ("dopplerIdx", "<i2"),
+        ("peakVal", "<i2"),
+        ("x", "<f4"),
+        ("y", "<f4"),
+        ("z", "<f4"),
+        ("range", "<f4"),
+        ("doppler", "<f4"),
+        # SDK 3.x side info, 0 without it
+        ("snr", "<i2"),
+        ("noise", "<i2"),
+    ]
+)
+
+
+# Fields every frame's points have
+POINT_FIELDS = POINT_DTYPE.names[:-2]
+
+
+# gridSize > 0 adds the azimuth heatmap of frame.Frame.zi. Only the live
+# sinks use it, recordings are written without.
+def frameDtype(numRangeBins, numDopplerBins, gridSize=0):
+    fields = [
+        ("frameNumber", "<u4"),
+        # Bit (1 << tlv_type) is set for every TLV the frame carried
+        ("tlvMask", "<u4"),
+        ("timestamp", "<f8"),
+        ("pointOffset", "<u8"),
+        ("numObj", "<u4"),
+        ("rp", "<u2", (numRangeBins,)),
+        ("noiserp", "<u2", (numRangeBins,)),
+        ("rangeDoppler", "<u2", (numDopplerBins, numRangeBins)),
+        ("stats", STATS_DTYPE),
+    ]
+    if gridSize:
+        fields.append(("zi", "<f4", (gridSize, gridSize)))
+    return np.dtype(fields)
+
+
+def _descr(dtype):
+    return json.loads(json.dumps(dtype.descr))
+
+
+# Inverse of _descr. JSON turns the (name, type[, shape]) tuples into lists.
+def _dtype(descr):
+    def field(f):
+        name, fieldType, *shape = f
+        if isinstance(fieldType, list):
+            fieldType = [field(sub) for sub in fieldType]
+        return (name, fieldType, *[tuple(s) for s in shape])
+
+    return np.dtype([field(f) for f in descr])
+
+
+# Fill a zeroed frameDtype record from a frame.Frame. Returns the detected
+# points as a POINT_DTYPE array; pointOffset is left to the caller.
+# Structured arrays convert field by position, so the points are copied
+# field by field.
+def fillRecord(record, frame):
+    record["frameNumber"] = frame.frameNumber
+    record["timestamp"] = frame.timestamp
+    record["tlvMask"] = frame.tlvMask
+    record["numObj"] = frame.numObj
+    if frame.has(MMWDEMO_UART_MSG_RANGE_PROFILE):
+        record["rp"] = frame.rp
+    if frame.has(MMWDEMO_OUTPUT_MSG_NOISE_PROFILE):
+        record["noiserp"] = frame.noiserp
+    if frame.has(MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP):
+        record["rangeDoppler"] = frame.rangeDoppler
+    if frame.has(MMWDEMO_OUTPUT_MSG_STATS):
+        record["stats"] = frame.stats
+    if frame.has(MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP) and "zi" in record.dtype.names:
+        record["zi"] = frame.zi
+    points = np.zeros(frame.numObj, dtype=POINT_DTYPE)
+    for name in POINT_FIELDS:
+        points[name] = frame.points[name]
+    if frame.has(MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO):
+        points["snr"] = frame.points["snr"]
+        points["noise"] = frame.points["noise"]
+    return points
+
+
+class RecordingWriter:
+    # source, when given, is stored in the header as is (e.g. the CSV file a
+    # recording was converted from)
+    def __init__(self, path, configParameters, bufferSize=2**20, source=None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        numRangeBins = int(configParameters["numRangeBins"])
+        numDopplerBins = int(configParameters["numDopplerBins"])
+        self.frameDtype = frameDtype(numRangeBins, numDopplerBins)
+        header = {
+            "version": FORMAT_VERSION,
+            "created": time.time(),
+            "configParameters": configParameters,
+            "frameDtype": _descr(self.frameDtype),
+            "pointDtype": _descr(POINT_DTYPE),
+        }
+        if source is not None:
+            header["source"] = source
+        headerFile = self.path / "header.json"
+        if headerFile.exists():
+            # Appending to an existing recording, its layout must match
+            with open(headerFile) as f:
+                existing = json.load(f)
+            if (existing["frameDtype"], existing["pointDtype"]) != (
+                header["frameDtype"],
+                header["pointDtype"],
+            ):
+                raise ValueError(f"{self.path} was recorded with another layout")
+        else:
+            with open(headerFile, "w") as f:
+                json.dump(header, f, indent=2)
+
+        # Large buffers, so the disk is hit every few dozen frames
+        self.framesFile = open(self.path / "frames.bin", "ab", buffering=bufferSize)
+        self.pointsFile = open(self.path / "points.bin", "ab", buffering=bufferSize)
+        self.numPoints = (
+            os.path.getsize(self.path / "points.bin") // POINT_DTYPE.itemsize
+        )
+
+        # Reused for every frame
+        self.record = np.zeros(1, dtype=self.frameDtype)
+        self._emptyRecord = np.zeros(1, dtype=self.frameDtype)
+
+    # Append one frame.Frame
+    def write(self, frame):
+        self.record[:] = self._emptyRecord
+        record = self.record[0]
+        points = fillRecord(record, frame)
+        record["pointOffset"] = self.numPoints
+        if len(points):
+            self.pointsFile.write(points.tobytes())
+            self.numPoints += len(points)
+
+        self.framesFile.write(self.record.tobytes())
+
+    # Add or replace top-level header fields, e.g. the loss counters of the
+    # session when it ends
+    def update_header(self, **fields):
+        headerFile = self.path / "header.json"
+        with open(headerFile) as f:
+            header = json.load(f)
+        header.update(fields)
+        tmp = headerFile.with_name(headerFile.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp, headerFile)
+
+    def flush(self):
+        # Points first, so a reader never sees a frame without its points
+        self.pointsFile.flush()
+        self.framesFile.flush()
+
+    def close(self):
+        self.flush()
+        self.pointsFile.close()
+        self.framesFile.close()
+
+
+# Read-only array of the dtype records in filename (a Path). np.memmap
+# refuses empty files, so a missing or empty file gives an empty array. A
+# partly written trailing record (e.g. while the file is still being written)
+# is left out.
+def memmap(filename, dtype):
+    count = os.path.getsize(filename) // dtype.itemsize if filename.exists() else 0
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode="r", shape=(count,))
+
+
+# Read-only view of a recording. recording.frames is the memory-mapped frame
+# array; recording[n] returns (frame record, its points) without touching
+# any other frame. The points of a version 1 recording are returned as
+# POINT_DTYPE with snr and noise 0, recording.points keeps the stored layout.
+class Recording:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "header.json") as f:
+            self.header = json.load(f)
+        if self.header["version"] not in (1, FORMAT_VERSION):
+            raise ValueError(f"Unsupported recording version {self.header['version']}")
+        self.configParameters = self.header["configParameters"]
+        self.frameDtype = _dtype(self.header["frameDtype"])
+        self.pointDtype = _dtype(self.header["pointDtype"])
+        self.frames = memmap(self.path / "frames.bin", self.frameDtype)
+        self.points = memmap(self.path / "points.bin", self.pointDtype)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, n):
+        frame = self.frames[n]
+        start = int(frame["pointOffset"])
+        points = self.points[start : start + int(frame["numObj"])]
+        if self.pointDtype != POINT_DTYPE:
+            stored = points
+            points = np.zeros(len(stored), dtype=POINT_DTYPE)
+            for name in POINT_FIELDS:
+                points[name] = stored[name]
+        return frame, points
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+# Byte accumulator for the UART stream. Bytes are written at writePos and
+# consumed from readPos; both are absolute stream offsets, their position in
+# the storage is taken modulo the capacity. Consuming only moves readPos, so
+# nothing is shifted or zero-filled per frame.
+class RingBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self.array = np.frombuffer(self._data, dtype="uint8")
+        # Holds a copy of a region that wraps around the end of the storage
+        self._scratch = np.zeros(capacity, dtype="uint8")
+        self.readPos = 0
+        self.writePos = 0
+
+    def __len__(self):
+        return self.writePos - self.readPos
+
+    def free(self):
+        return self.capacity - len(self)
+
+    def clear(self):
+        self.readPos = self.writePos = 0
+
+    # Append data, returns False without writing anything if it does not fit
+    def write(self, data):
+        byteVec = memoryview(data).cast("B")
+        byteCount = len(byteVec)
+        if byteCount > self.free():
+            return False
+        start = self.writePos % self.capacity
+        first = min(byteCount, self.capacity - start)
+        self._data[start : start + first] = byteVec[:first]
+        if first < byteCount:
+            self._data[: byteCount - first] = byteVec[first:]
+        self.writePos += byteCount
+        return True
+
+    # Return n bytes starting offset bytes after readPos as one contiguous
+    # uint8 array. This is a view into the storage unless the region wraps,
+    # in which case it is copied to a scratch array that stays valid until
+    # the next wrapping peek.
+    def peek(self, n, offset=0):
+        if offset + n > len(self):
+            raise IndexError("peek past the end of the buffered data")
+        start = (self.readPos + offset) % self.capacity
+        if start + n <= self.capacity:
+            return self.array[start : start + n]
+        first = self.capacity - start
+        self._scratch[:first] = self.array[start:]
+        self._scratch[first:n] = self.array[: n - first]
+        return self._scratch[:n]
+
+    def consume(self, n):
+        self.readPos += min(n, len(self))
+
+    # Offset (relative to readPos) of the first occurrence of pattern at or
+    # after offset start and ending before offset end, or -1.
+    def find(self, pattern, start=0, end=None):
+        end = len(self) if end is None else min(end, len(self))
+        if end - start < len(pattern):
+            return -1
+        begin = (self.readPos + start) % self.capacity
+        stop = begin + end - start
+        if stop <= self.capacity:
+            idX = self._data.find(pattern, begin, stop)
+            return -1 if idX < 0 else idX - begin + start
+
+        # Search up to the end of the storage, then across the seam, then
+        # from the start of the storage.
+        idX = self._data.find(pattern, begin, self.capacity)
+        if idX >= 0:
+            return idX - begin + start
+        seamStart = max(begin, self.capacity - len(pattern) + 1)
+        seam = bytes(self._data[seamStart:]) + bytes(
+            self._data[: min(len(pattern) - 1, stop - self.capacity)]
+        )
+        idX = seam.find(pattern)
+        if idX >= 0:
+            return seamStart + idX - begin + start
+        idX = self._data.find(pattern, 0, stop - self.capacity)
+        if idX >= 0:
+            return self.capacity - begin + idX + start
+        return -1
@@ -0,0 +1,96 @@
+import math
+import time
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+
+
+# Running summary of the time from a chunk arriving at the host to the
+# packets it completed being parsed
+class LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.last = 0.0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.last = seconds
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self):
+        return (
+            f"latency over {self.count} frames: last {self.last * 1e3:.2f} ms, "
+            f"mean {self.mean() * 1e3:.2f} ms, max {self.max * 1e3:.2f} ms"
+        )
+
+
+# Reads the data port with blocking reads and hands (perf_counter timestamp,
+# bytes) chunks to the parser through a queue. The read timeout is one frame
+# period, so the thread wakes up at least once per frame to check whether it
+# should stop. The queue is bounded by bytes, not chunks: a read returns
+# whatever has arrived, often a fraction of a packet, so a chunk count says
+# little about how long a stall the queue absorbs. By default it holds
+# bufferSeconds of packets of maxPacketLen bytes at the frame rate. Chunks
+# that do not fit are dropped and counted rather than stalling the UART.
+class SerialReaderThread(Thread):
+    def __init__(
+        self, Dataport, framePeriodicity, maxPacketLen, bufferSeconds=2.0, maxBytes=None
+    ):
+        super().__init__()
+        self.daemon = True
+
+        self._stop_event = Event()
+
+        self.Dataport = Dataport
+        # framePeriodicity is in ms, as in frameCfg
+        self.Dataport.timeout = max(framePeriodicity, 1) / 1000
+        if maxBytes is None:
+            framesPerSecond = 1000 / max(framePeriodicity, 1)
+            maxBytes = math.ceil(bufferSeconds * framesPerSecond) * maxPacketLen
+        self.maxBytes = maxBytes
+        self.chunks = Queue()
+        self.queuedBytes = 0
+        self.lock = Lock()
+        self.latency = LatencyStats()
+        self.droppedChunks = 0
+        self.droppedBytes = 0
+
+    def run(self):
+        while not self._stop_event.is_set():
+            # Block for the first byte, then take whatever else is waiting
+            readBuffer = self.Dataport.read(1)
+            if not readBuffer:
+                continue
+            readBuffer += self.Dataport.read(self.Dataport.in_waiting)
+            with self.lock:
+                if self.queuedBytes + len(readBuffer) > self.maxBytes:
+                    self.droppedChunks += 1
+                    self.droppedBytes += len(readBuffer)
+                    continue
+                self.queuedBytes += len(readBuffer)
+            self.chunks.put((time.perf_counter(), readBuffer))
+
+    # Wait up to timeout seconds for a chunk, then return it together with
+    # every other chunk already queued
+    def get_chunks(self, timeout):
+        try:
+            chunks = [self.chunks.get(timeout=timeout)]
+        except Empty:
+            return []
+        while True:
+            try:
+                chunks.append(self.chunks.get_nowait())
+            except Empty:
+                break
+        with self.lock:
+            self.queuedBytes -= sum(len(chunk) for _, chunk in chunks)
+        return chunks
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
@@ -0,0 +1,172 @@
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from frame import azimuthGridSize
+from recording import POINT_DTYPE, fillRecord, frameDtype
+from tlv import MAX_DETECTED_OBJ
+
+# Live frames from the acquisition process to viewers on the same machine
+# through a shared memory ring of fixed-layout slots. The segment holds
+#
+#   HEADER_DTYPE  the ring's layout and the sequence number of the newest frame
+#   numSlots      slots of (seq, frame record as in recording.py, points)
+#
+# The publisher writes the slot after the newest one and then bumps the
+# header's seq, a subscriber copies the newest slot. A slot's own seq is 0
+# while it is being written, so a copy is only kept when the slot held the
+# same seq before and after it. Nothing is serialized and neither side ever
+# waits for the other.
+
+SHARED_FRAMES_NAME = "mmwave_frames"
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("numRangeBins", "<u4"),
+        ("numDopplerBins", "<u4"),
+        ("maxObj", "<u4"),
+        ("numSlots", "<u4"),
+        # Set when the publisher goes away, e.g. for a new configuration
+        ("closed", "<u4"),
+        # Side of the azimuth heatmap, 0 without it
+        ("gridSize", "<u4"),
+        ("seq", "<u8"),
+    ]
+)
+
+
+def slotDtype(numRangeBins, numDopplerBins, maxObj, gridSize=0):
+    return np.dtype(
+        [
+            ("seq", "<u8"),
+            ("frame", frameDtype(numRangeBins, numDopplerBins, gridSize)),
+            ("points", POINT_DTYPE, (maxObj,)),
+        ]
+    )
+
+
+def _views(shm):
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+    dtype = slotDtype(
+        int(header["numRangeBins"]),
+        int(header["numDopplerBins"]),
+        int(header["maxObj"]),
+        int(header["gridSize"]),
+    )
+    slots = np.ndarray(
+        (int(header["numSlots"]),),
+        dtype=dtype,
+        buffer=shm.buf,
+        offset=HEADER_DTYPE.itemsize,
+    )
+    return header, slots
+
+
+class SharedFramePublisher:
+    def __init__(
+        self,
+        configParameters,
+        name=SHARED_FRAMES_NAME,
+        numSlots=8,
+        maxObj=MAX_DETECTED_OBJ,
+    ):
+        numRangeBins = int(configParameters["numRangeBins"])
+        numDopplerBins = int(configParameters["numDopplerBins"])
+        gridSize = azimuthGridSize(configParameters)
+        size = (
+            HEADER_DTYPE.itemsize
+            + numSlots
+            * slotDtype(numRangeBins, numDopplerBins, maxObj, gridSize).itemsize
+        )
+
+        # Left behind by a publisher that did not exit cleanly
+        try:
+            stale = SharedMemory(name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = SharedMemory(name, create=True, size=size)
+
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        header[...] = 0
+        header["numRangeBins"] = numRangeBins
+        header["numDopplerBins"] = numDopplerBins
+        header["maxObj"] = maxObj
+        header["numSlots"] = numSlots
+        header["gridSize"] = gridSize
+        del header
+        self.header, self.slots = _views(self.shm)
+        self.slots[:] = np.zeros(1, dtype=self.slots.dtype)
+        self._emptyFrame = np.zeros((), dtype=self.slots.dtype["frame"])
+        self.truncatedFrames = 0
+
+    # Publish a frame.Frame
+    def publish(self, frame):
+        seq = int(self.header["seq"]) + 1
+        slot = self.slots[seq % len(self.slots) : seq % len(self.slots) + 1]
+        slot["seq"] = 0
+
+        record = slot["frame"]
+        record[...] = self._emptyFrame
+        points = fillRecord(record[0], frame)
+        numObj = min(len(points), slot["points"].shape[1])
+        if numObj < len(points):
+            self.truncatedFrames += 1
+            record["numObj"] = numObj
+        slot["points"][0, :numObj] = points[:numObj]
+
+        slot["seq"] = seq
+        self.header["seq"] = seq
+
+    def close(self):
+        self.header["closed"] = 1
+        # The segment cannot be closed while arrays still point into it
+        del self.header, self.slots
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedFrameSubscriber:
+    def __init__(self, name=SHARED_FRAMES_NAME):
+        # Without track=False (Python 3.13) attaching registers the segment
+        # with the resource tracker, which would unlink it when this process
+        # exits
+        try:
+            self.shm = SharedMemory(name, track=False)
+        except TypeError:
+            self.shm = SharedMemory(name)
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.header, self.slots = _views(self.shm)
+        self.lastSeq = 0
+        # Frames published while this subscriber was not looking
+        self.skippedFrames = 0
+
+    def closed(self):
+        return bool(self.header["closed"])
+
+    # Copy of the newest (frame, points) if one was published since the last
+    # call, otherwise None
+    def latest(self):
+        while True:
+            seq = int(self.header["seq"])
+            if seq == self.lastSeq:
+                return None
+            slot = self.slots[seq % len(self.slots)]
+            if int(slot["seq"]) != seq:
+                # Already being overwritten, a newer seq is on its way
+                continue
+            copy = slot.copy()
+            if int(slot["seq"]) == seq:
+                break
+
+        if self.lastSeq:
+            self.skippedFrames += max(seq - self.lastSeq - 1, 0)
+        self.lastSeq = seq
+        frame = copy["frame"]
+        return frame, copy["points"][: int(frame["numObj"])]
+
+    def close(self):
+        del self.header, self.slots
+        self.shm.close()
@@ -0,0 +1,187 @@
+import time
+from bisect import bisect_right
+
+from tlv import TLV_NAMES
+
+# Timing of the acquisition pipeline. Every stage (serial read, magic word
+# sync, each TLV parser, the recording write) adds its duration, measured
+# with time.perf_counter_ns, to a histogram with fixed buckets, so recording
+# costs a bisect and an increment and memory never grows:
+#
+#   start = time.perf_counter_ns()
+#   ...
+#   pipelineStats.add("sync", time.perf_counter_ns() - start)
+
+# Upper bucket edges in ns, doubling from 1 us to about 1 s. The last bucket
+# takes everything slower.
+BUCKET_EDGES_NS = [1000 << k for k in range(21)]
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_EDGES_NS) + 1)
+        self.count = 0
+        self.totalNs = 0
+        self.maxNs = 0
+
+    def add(self, ns):
+        self.counts[bisect_right(BUCKET_EDGES_NS, ns)] += 1
+        self.count += 1
+        self.totalNs += ns
+        if ns > self.maxNs:
+            self.maxNs = ns
+
+    def mean(self):
+        return self.totalNs / self.count if self.count else 0.0
+
+    # Upper edge of the bucket holding the q-th quantile (0 < q <= 1)
+    def quantile(self, q):
+        target = q * self.count
+        seen = 0
+        for edge, count in zip(BUCKET_EDGES_NS, self.counts):
+            seen += count
+            if count and seen >= target:
+                return edge
+        return self.maxNs
+
+    def __str__(self):
+        return (
+            f"n {self.count:6d}  mean {self.mean() / 1e3:9.1f} us  "
+            f"p50 <{self.quantile(0.5) / 1e3:8.0f} us  "
+            f"p99 <{self.quantile(0.99) / 1e3:8.0f} us  "
+            f"max {self.maxNs / 1e3:9.1f} us"
+        )
+
+
+# Completeness of a session: frames missing from the frameNumber sequence
+# and bytes lost on the way to the parser
+class LossStats:
+    def __init__(self):
+        self.frames = 0
+        self.lostFrames = 0
+        self.gaps = 0
+        # frameNumber went backwards, i.e. the sensor was restarted
+        self.restarts = 0
+        # Reads that did not fit in the byte buffer
+        self.overflowBytes = 0
+        # Chunks the reader thread could not queue
+        self.readerDroppedBytes = 0
+        # Bytes skipped while looking for the magic word
+        self.resyncBytes = 0
+        # Frames with fewer complete TLVs than the header announced
+        self.truncatedFrames = 0
+        # Parsed frames the recording writer had to drop
+        self.writerDroppedFrames = 0
+        self.lastFrameNumber = None
+
+    def add_frame(self, frameNumber):
+        self.frames += 1
+        last = self.lastFrameNumber
+        if last is not None:
+            if frameNumber > last + 1:
+                self.lostFrames += frameNumber - last - 1
+                self.gaps += 1
+            elif frameNumber <= last:
+                self.restarts += 1
+        self.lastFrameNumber = frameNumber
+
+    def lossless(self):
+        return not (
+            self.lostFrames
+            or self.overflowBytes
+            or self.readerDroppedBytes
+            or self.resyncBytes
+            or self.truncatedFrames
+            or self.writerDroppedFrames
+        )
+
+    def as_dict(self):
+        return {k: v for k, v in vars(self).items() if k != "lastFrameNumber"}
+
+    def __str__(self):
+        return (
+            f"{self.lostFrames} frames lost in {self.gaps} gaps "
+            f"({self.restarts} restarts), {self.truncatedFrames} truncated, "
+            f"{self.writerDroppedFrames} not written, bytes dropped: "
+            f"{self.overflowBytes} on overflow, {self.readerDroppedBytes} by the "
+            f"reader, {self.resyncBytes} on resync"
+        )
+
+
+class PipelineStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.loss = LossStats()
+        self.stages = {}
+        self.tlvBytes = {}
+        self.frames = 0
+        self.started = time.perf_counter()
+        self._lastSummary = self.started
+        self._framesAtLastSummary = 0
+
+    def add(self, stage, ns):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.add(ns)
+
+    # A TLV of tlv_length payload bytes took ns to parse
+    def add_tlv(self, tlv_type, tlv_length, ns):
+        name = TLV_NAMES.get(tlv_type, f"tlv{tlv_type}")
+        self.add(name, ns)
+        self.tlvBytes[name] = self.tlvBytes.get(name, 0) + tlv_length
+
+    def add_frame(self):
+        self.frames += 1
+
+    def frames_per_second(self):
+        elapsed = time.perf_counter() - self.started
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    # Plain values, e.g. for a GUI
+    def snapshot(self):
+        return {
+            "frames": self.frames,
+            "framesPerSecond": self.frames_per_second(),
+            "tlvBytes": dict(self.tlvBytes),
+            "loss": self.loss.as_dict(),
+            "stages": {
+                stage: {
+                    "count": h.count,
+                    "meanNs": h.mean(),
+                    "p99Ns": h.quantile(0.99),
+                    "maxNs": h.maxNs,
+                    "counts": list(h.counts),
+                }
+                for stage, h in self.stages.items()
+            },
+        }
+
+    def __str__(self):
+        now = time.perf_counter()
+        recent = (self.frames - self._framesAtLastSummary) / max(
+            now - self._lastSummary, 1e-9
+        )
+        lines = [
+            f"{self.frames} frames, {recent:.1f} frames/s recently, "
+            f"{self.frames_per_second():.1f} frames/s overall",
+            f"  {self.loss}",
+        ]
+        for stage, histogram in self.stages.items():
+            lines.append(f"  {stage:20s} {histogram}")
+        for name, numBytes in self.tlvBytes.items():
+            lines.append(f"  {name:20s} {numBytes / 1e6:.2f} MB")
+        return "\n".join(lines)
+
+    # Print the summary when interval seconds have passed since the last one.
+    # Returns whether it did.
+    def print_every(self, interval):
+        now = time.perf_counter()
+        if interval and now - self._lastSummary >= interval:
+            print(self)
+            self._lastSummary = now
+            self._framesAtLastSummary = self.frames
+            return True
+        return False
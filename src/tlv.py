@@ -0,0 +1,228 @@
+import numpy as np
+
+# TLV message types sent by the xWR16xx out-of-box demo
+MMWDEMO_UART_MSG_DETECTED_POINTS = 1
+MMWDEMO_UART_MSG_RANGE_PROFILE = 2
+MMWDEMO_OUTPUT_MSG_NOISE_PROFILE = 3
+MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP = 4
+MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP = 5
+MMWDEMO_OUTPUT_MSG_STATS = 6
+# SDK 3.x: SNR and noise of every detected point
+MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO = 7
+
+# Short names, e.g. for statistics
+TLV_NAMES = {
+    MMWDEMO_UART_MSG_DETECTED_POINTS: "detectedPoints",
+    MMWDEMO_UART_MSG_RANGE_PROFILE: "rangeProfile",
+    MMWDEMO_OUTPUT_MSG_NOISE_PROFILE: "noiseProfile",
+    MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP: "azimuthHeatMap",
+    MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP: "rangeDopplerHeatMap",
+    MMWDEMO_OUTPUT_MSG_STATS: "stats",
+    MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO: "sideInfo",
+}
+
+MAGIC_WORD = bytes([2, 1, 4, 3, 6, 5, 8, 7])
+
+# guiMonitor arguments (after the subframe) in order, and the TLV each one
+# enables. The names are those of input.Transform.
+GUI_MONITOR_TLVS = [
+    ("detectedObjects", MMWDEMO_UART_MSG_DETECTED_POINTS),
+    ("logMagRange", MMWDEMO_UART_MSG_RANGE_PROFILE),
+    ("noiseProfile", MMWDEMO_OUTPUT_MSG_NOISE_PROFILE),
+    ("rangeAzimuthHeatMap", MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP),
+    ("rangeDopplerHeatMap", MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP),
+    ("statsInfo", MMWDEMO_OUTPUT_MSG_STATS),
+]
+
+PACKET_ALIGN = 32
+# Generous bound on the detected object list of one frame, used for sizing
+MAX_DETECTED_OBJ = 512
+
+# ------------------------------------------------------------------
+
+# Wire layouts of the UART packet. Everything is little-endian, so these
+# dtypes can be laid directly over the received bytes with np.frombuffer.
+
+FRAME_HEADER_DTYPE = np.dtype(
+    [
+        ("magicWord", "u1", (8,)),
+        ("version", "<u4"),
+        ("totalPacketLen", "<u4"),
+        ("platform", "<u4"),
+        ("frameNumber", "<u4"),
+        ("timeCpuCycles", "<u4"),
+        ("numDetectedObj", "<u4"),
+        ("numTLVs", "<u4"),
+        ("subFrameNumber", "<u4"),
+    ]
+)
+
+TLV_HEADER_DTYPE = np.dtype([("type", "<u4"), ("length", "<u4")])
+
+# Descriptor at the start of the detected points TLV
+OBJ_DESCRIPTOR_DTYPE = np.dtype([("numObj", "<u2"), ("xyzQFormat", "<u2")])
+
+# Detected object of SDK 2.x, the coordinates in the Q format of the
+# descriptor
+DETECTED_OBJ_DTYPE = np.dtype(
+    [
+        ("rangeIdx", "<i2"),
+        ("dopplerIdx", "<i2"),
+        ("peakVal", "<i2"),
+        ("x", "<i2"),
+        ("y", "<i2"),
+        ("z", "<i2"),
+    ]
+)
+
+# Detected point of SDK 3.x, in m and m/s. The TLV has no descriptor.
+POINT_CLOUD_DTYPE = np.dtype(
+    [
+        ("x", "<f4"),
+        ("y", "<f4"),
+        ("z", "<f4"),
+        ("velocity", "<f4"),
+    ]
+)
+
+# Side info of an SDK 3.x point, in 0.1 dB
+SIDE_INFO_DTYPE = np.dtype([("snr", "<i2"), ("noise", "<i2")])
+
+STATS_DTYPE = np.dtype(
+    [
+        ("interFrameProcessingTime", "<u4"),
+        ("transmitOutputTime", "<u4"),
+        ("interFrameProcessingMargin", "<u4"),
+        ("interChirpProcessingMargin", "<u4"),
+        ("activeFrameCPULoad", "<u4"),
+        ("interFrameCPULoad", "<u4"),
+    ]
+)
+
+
+# Payload bytes of every TLV type for a configuration. The detected object
+# list has no size in the configuration, maxObj bounds it.
+def tlvPayloadSizes(numRangeBins, numDopplerBins, numVirtAnt, maxObj=MAX_DETECTED_OBJ):
+    return {
+        # The larger of the SDK 2.x and 3.x layouts
+        MMWDEMO_UART_MSG_DETECTED_POINTS: max(
+            OBJ_DESCRIPTOR_DTYPE.itemsize + maxObj * DETECTED_OBJ_DTYPE.itemsize,
+            maxObj * POINT_CLOUD_DTYPE.itemsize,
+        ),
+        MMWDEMO_UART_MSG_RANGE_PROFILE: 2 * numRangeBins,
+        MMWDEMO_OUTPUT_MSG_NOISE_PROFILE: 2 * numRangeBins,
+        # One complex int16 per range bin and virtual antenna
+        MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP: 4 * numRangeBins * numVirtAnt,
+        MMWDEMO_OUTPUT_MSG_RANGE_DOPPLER_HEAT_MAP: 2 * numRangeBins * numDopplerBins,
+        MMWDEMO_OUTPUT_MSG_STATS: STATS_DTYPE.itemsize,
+        MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO: maxObj * SIDE_INFO_DTYPE.itemsize,
+    }
+
+
+# Largest packet a configuration can produce, from parseConfigFile's
+# configParameters. Only the TLVs enabled by guiMonitor are counted (all of
+# them when the configuration has no guiMonitor line).
+def maxPacketLen(configParameters, maxObj=MAX_DETECTED_OBJ):
+    payloads = tlvPayloadSizes(
+        int(configParameters["numRangeBins"]),
+        int(configParameters["numDopplerBins"]),
+        int(configParameters.get("numVirtualAntennas", 8)),
+        maxObj,
+    )
+    guiMonitor = configParameters.get("guiMonitor")
+    length = FRAME_HEADER_DTYPE.itemsize
+    for name, tlv_type in GUI_MONITOR_TLVS:
+        if guiMonitor is None or guiMonitor.get(name):
+            length += TLV_HEADER_DTYPE.itemsize + payloads[tlv_type]
+            # SDK 3.x sends the side info along with the points
+            if tlv_type == MMWDEMO_UART_MSG_DETECTED_POINTS:
+                side = MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO
+                length += TLV_HEADER_DTYPE.itemsize + payloads[side]
+    # Packets are padded to a multiple of PACKET_ALIGN bytes
+    return -(-length // PACKET_ALIGN) * PACKET_ALIGN
+
+
+# ------------------------------------------------------------------
+
+# The decoders below return views into the buffer they were given, so the
+# results are only valid until those bytes are overwritten.
+
+
+# Major SDK version from the version field of the frame header, e.g. 2 for
+# 0x02010004 (2.1.0.4)
+def sdkMajorVersion(version):
+    return (int(version) >> 24) & 0xFF
+
+
+def parseFrameHeader(buffer, offset=0):
+    return np.frombuffer(buffer, dtype=FRAME_HEADER_DTYPE, count=1, offset=offset)[0]
+
+
+# Walk the TLVs of a packet whose header starts at offset. Returns a list of
+# (tlv_type, payload offset, tlv_length) tuples. TLVs that would run past
+# offset + totalPacketLen are not returned.
+def parseTlvHeaders(buffer, numTLVs, totalPacketLen, offset=0):
+    tlvs = []
+    end = offset + totalPacketLen
+    idX = offset + FRAME_HEADER_DTYPE.itemsize
+    for _ in range(numTLVs):
+        if idX + TLV_HEADER_DTYPE.itemsize > end:
+            break
+        tlv = np.frombuffer(buffer, dtype=TLV_HEADER_DTYPE, count=1, offset=idX)[0]
+        idX += TLV_HEADER_DTYPE.itemsize
+        tlv_type, tlv_length = int(tlv["type"]), int(tlv["length"])
+        if idX + tlv_length > end:
+            break
+        tlvs.append((tlv_type, idX, tlv_length))
+        idX += tlv_length
+    return tlvs
+
+
+def decodeFrame(buffer, offset=0):
+    header = parseFrameHeader(buffer, offset)
+    tlvs = parseTlvHeaders(
+        buffer, int(header["numTLVs"]), int(header["totalPacketLen"]), offset
+    )
+    return header, tlvs
+
+
+# Returns the detected objects as a DETECTED_OBJ_DTYPE array together with
+# the Q format of the x, y, z coordinates.
+def decodeDetectedPoints(buffer, idX):
+    descriptor = np.frombuffer(
+        buffer, dtype=OBJ_DESCRIPTOR_DTYPE, count=1, offset=idX
+    )[0]
+    objects = np.frombuffer(
+        buffer,
+        dtype=DETECTED_OBJ_DTYPE,
+        count=int(descriptor["numObj"]),
+        offset=idX + OBJ_DESCRIPTOR_DTYPE.itemsize,
+    )
+    return objects, int(descriptor["xyzQFormat"])
+
+
+# SDK 3.x detected points as a POINT_CLOUD_DTYPE array
+def decodePointCloud(buffer, idX, tlv_length):
+    return np.frombuffer(
+        buffer,
+        dtype=POINT_CLOUD_DTYPE,
+        count=tlv_length // POINT_CLOUD_DTYPE.itemsize,
+        offset=idX,
+    )
+
+
+def decodeSideInfo(buffer, idX, tlv_length):
+    return np.frombuffer(
+        buffer,
+        dtype=SIDE_INFO_DTYPE,
+        count=tlv_length // SIDE_INFO_DTYPE.itemsize,
+        offset=idX,
+    )
+
+
+def decodeProfile(buffer, idX, numRangeBins):
+    return np.frombuffer(buffer, dtype="<u2", count=numRangeBins, offset=idX)
+
+
+def decodeStatistics(buffer, idX):
+    return np.frombuffer(buffer, dtype=STATS_DTYPE, count=1, offset=idX)[0]
@@ -0,0 +1,93 @@
+import time
+from pathlib import Path
+
+import pytest
+
+serial = pytest.importorskip("serial")
+
+from clisession import CliError, CliSession, readCommands
+from emulator import EmulatedDevice, _Pty
+
+CONFIG = (
+    Path(__file__).resolve().parent.parent
+    / "src"
+    / "Configurations"
+    / "pointcloud_configuration.cfg"
+)
+
+# Commands EmulatedDevice handles itself instead of collecting
+SESSION_COMMANDS = ("sensorStop", "flushCfg", "sensorStart")
+
+
+@pytest.fixture
+def connect():
+    devices, ports = [], []
+
+    def connect(**kwargs):
+        device = EmulatedDevice(fps=10, **kwargs)
+        device.start()
+        port = serial.Serial(device.cliPort, 115200)
+        devices.append(device)
+        ports.append(port)
+        return device, port
+
+    yield connect
+    for port in ports:
+        port.close()
+    for device in devices:
+        device.stop()
+
+
+@pytest.mark.parametrize("window", [1, 4])
+def test_configuration_is_acknowledged(connect, window):
+    device, port = connect()
+    commands = readCommands(CONFIG)
+    results = CliSession(port, window=window).run(commands)
+    assert [result.command for result in results] == commands
+    assert all(result.ok and result.rtt > 0 for result in results)
+    assert device.sensor is not None
+
+
+def test_ignored_command_is_done(connect):
+    _, port = connect()
+    result = CliSession(port).send("sensorStop")
+    assert result.ok
+    assert result.response == ["Ignored: Sensor is already stopped"]
+
+
+@pytest.mark.parametrize("window", [1, 4])
+def test_rejected_command_stops_the_configuration(connect, window):
+    device, port = connect(reject=["frameCfg"])
+    commands = readCommands(CONFIG)
+    failed = next(i for i, c in enumerate(commands) if c.startswith("frameCfg"))
+    session = CliSession(port, window=window)
+    results = []
+    with pytest.raises(CliError) as error:
+        for result in session.iter_run(commands):
+            results.append(result)
+    assert error.value.result.command == commands[failed]
+    assert error.value.result.response == ["Error -1"]
+    assert [result.command for result in results] == commands[:failed]
+    # The device keeps the configuration commands it accepted. Besides those
+    # before frameCfg, only the ones already in flight may have reached it.
+    time.sleep(0.1)
+    before = [c for c in commands[:failed] if c.split()[0] not in SESSION_COMMANDS]
+    assert device.commands[: len(before)] == before
+    assert len(device.commands) - len(before) <= window - 1
+    assert device.sensor is None
+
+
+def test_timeout_without_an_answer():
+    pty = _Pty()
+    port = serial.Serial(pty.name, 115200)
+    try:
+        session = CliSession(port, timeout=0.2)
+        start = time.perf_counter()
+        with pytest.raises(CliError) as error:
+            session.send("sensorStop")
+        assert 0.2 <= time.perf_counter() - start < 1
+        assert not error.value.result.ok
+        assert "no response" in str(error.value)
+    finally:
+        port.close()
+        pty.close()
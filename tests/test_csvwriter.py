@@ -0,0 +1,45 @@
+import csv
+import time
+
+from csvwriter import CsvWriterThread
+from frame import Frame
+from tlv import MMWDEMO_UART_MSG_RANGE_PROFILE
+
+FIELDNAMES = ["Date", "Time", "rp"]
+
+
+def _frame(value):
+    frame = Frame(4, 2)
+    frame.reset(value)
+    frame.rp[:] = value
+    frame.mark(MMWDEMO_UART_MSG_RANGE_PROFILE)
+    return frame
+
+
+def _rows(filename):
+    with open(filename, newline="") as f:
+        return [row[2] for row in csv.reader(f)]
+
+
+def test_switch_on_a_full_queue_does_not_block(tmp_path):
+    first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+    writer = CsvWriterThread(first, FIELDNAMES, maxFrames=2)
+    # Not started yet, so the queue fills up
+    for value in (1, 2, 3):
+        writer.put(_frame(value))
+    assert writer.droppedFrames == 1
+
+    start = time.perf_counter()
+    writer.set_file(second)
+    assert time.perf_counter() - start < 0.1
+
+    writer.start()
+    deadline = time.perf_counter() + 2
+    while writer.depth() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    writer.put(_frame(4))
+    writer.stop()
+
+    # The rows queued before the switch stay in the first file
+    assert _rows(first) == ["[1, 1, 1, 1]", "[2, 2, 2, 2]"]
+    assert _rows(second) == ["[4, 4, 4, 4]"]
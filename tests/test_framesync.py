@@ -0,0 +1,109 @@
+import numpy as np
+
+from framesync import FrameSync
+from ringbuffer import RingBuffer
+from tlv import FRAME_HEADER_DTYPE, MAGIC_WORD, parseFrameHeader
+
+
+def _packet(frameNumber, length=256, totalPacketLen=None):
+    header = np.zeros((), dtype=FRAME_HEADER_DTYPE)
+    header["magicWord"] = np.frombuffer(MAGIC_WORD, dtype="u1")
+    header["totalPacketLen"] = length if totalPacketLen is None else totalPacketLen
+    header["frameNumber"] = frameNumber
+    body = bytes((frameNumber + i) % 200 + 10 for i in range(length - len(header.tobytes())))
+    return header.tobytes() + body
+
+
+# Scan after every chunk and consume the packets found, returning their
+# frame numbers
+def _frames(sync, chunks):
+    buffer = sync.buffer
+    frameNumbers = []
+    for chunk in chunks:
+        assert buffer.write(chunk)
+        consumed = 0
+        for offset, length in sync.scan():
+            offset -= consumed
+            header = parseFrameHeader(buffer.peek(FRAME_HEADER_DTYPE.itemsize, offset))
+            frameNumbers.append(int(header["frameNumber"]))
+            buffer.consume(offset + length)
+            consumed += offset + length
+    return frameNumbers
+
+
+def _chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_packets_across_chunks():
+    data = b"noise" + b"".join(_packet(n) for n in range(1, 6))
+    for size in (1, 7, 100, len(data)):
+        sync = FrameSync(RingBuffer(4096))
+        assert _frames(sync, _chunked(data, size)) == [1, 2, 3, 4, 5]
+        assert sync.skippedBytes == len(b"noise")
+
+
+def test_garbage_length_is_skipped():
+    for totalPacketLen in (8, 1 << 30):
+        bad = _packet(9, totalPacketLen=totalPacketLen)[: FRAME_HEADER_DTYPE.itemsize]
+        data = _packet(1) + bad + _packet(2)
+        sync = FrameSync(RingBuffer(4096))
+        assert _frames(sync, _chunked(data, 50)) == [1, 2]
+        assert sync.skippedBytes == len(bad)
+
+
+def test_lost_tail_resyncs_at_the_next_magic_word():
+    damaged = _packet(2, length=512)
+    damaged = damaged[:200] + damaged[264:]
+    data = _packet(1) + damaged + _packet(3) + _packet(4)
+    for size in (64, len(data)):
+        sync = FrameSync(RingBuffer(4096))
+        assert _frames(sync, _chunked(data, size)) == [1, 3, 4]
+        assert sync.skippedBytes == len(damaged)
+
+
+def test_magic_word_across_the_seam():
+    buffer = RingBuffer(1000)
+    sync = FrameSync(buffer)
+    # 997 bytes in and out, so the magic word of the next packet wraps
+    assert _frames(sync, [b"x" * 997]) == []
+    assert buffer.readPos == buffer.writePos - len(MAGIC_WORD) + 1
+    assert _frames(sync, _chunked(_packet(1, 300) + _packet(2, 300), 128)) == [1, 2]
+
+
+def test_incomplete_packet_is_searched_once():
+    buffer = RingBuffer(1 << 16)
+    sync = FrameSync(buffer)
+    searched = []
+    find = buffer.find
+
+    # Bytes each search looks at before it returns
+    def countingFind(pattern, start=0, end=None):
+        idX = find(pattern, start, end)
+        if idX >= 0:
+            stop = idX + len(pattern)
+        else:
+            stop = len(buffer) if end is None else min(end, len(buffer))
+        searched.append(max(stop - start, 0))
+        return idX
+
+    buffer.find = countingFind
+    packet = _packet(1, length=16384)
+    assert _frames(sync, _chunked(packet, 64)) == [1]
+    # O(new bytes) per scan, not O(buffered bytes)
+    assert sum(searched) < 3 * len(packet)
+
+
+def test_ring_buffer_wraps():
+    buffer = RingBuffer(16)
+    assert buffer.write(b"0123456789")
+    buffer.consume(10)
+    assert buffer.write(b"abcdefghij")
+    assert not buffer.write(b"0123456789")
+    # The region wraps, peek returns a contiguous copy
+    assert buffer.peek(10).tobytes() == b"abcdefghij"
+    assert buffer.peek(4, 5).tobytes() == b"fghi"
+    assert buffer.find(b"fgh") == 5
+    assert buffer.find(b"fgh", 6) == -1
+    assert buffer.find(b"ij", 0, 9) == -1
+    assert buffer.find(b"ij", 0, 10) == 8
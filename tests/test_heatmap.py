@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+interpolate = pytest.importorskip("scipy.interpolate")
+
+from heatmap import buildAzimuthGridOperator, decodeRangeDoppler
+from tlv import MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP
+
+NUM_RANGE_BINS = 64
+RANGE_IDX_TO_METERS = 0.125
+NUM_ANGLE_BINS = 64
+RANGE_WIDTH = 5
+RANGE_DEPTH = 10
+GRID_SIZE = 50
+
+
+def _operator():
+    return buildAzimuthGridOperator(
+        NUM_RANGE_BINS,
+        RANGE_IDX_TO_METERS,
+        NUM_ANGLE_BINS,
+        RANGE_WIDTH,
+        RANGE_DEPTH,
+        GRID_SIZE,
+    )
+
+
+# Range (m) and sin(theta) of the rows and columns of fliplrQQ
+def _polarAxes():
+    ranges = np.arange(NUM_RANGE_BINS) * RANGE_IDX_TO_METERS
+    sines = (np.arange(NUM_ANGLE_BINS - 1) - NUM_ANGLE_BINS / 2 + 1) * 2 / NUM_ANGLE_BINS
+    return ranges, sines
+
+
+def _pixels(xlin, ylin):
+    x, y = np.meshgrid(xlin, ylin)
+    r = np.hypot(x, y)
+    s = np.divide(x, r, out=np.zeros_like(r), where=r > 0)
+    return x, y, r, s
+
+
+def test_operator_matches_bilinear_reference():
+    xlin, ylin, op = _operator()
+    ranges, sines = _polarAxes()
+    QQ = np.random.default_rng(0).random((len(ranges), len(sines)))
+
+    zi = (op @ QQ.ravel()).reshape(len(ylin), len(xlin))
+
+    reference = interpolate.RegularGridInterpolator(
+        (ranges, sines), QQ, bounds_error=False, fill_value=0.0
+    )
+    _, _, r, s = _pixels(xlin, ylin)
+    expected = reference(np.stack([r.ravel(), s.ravel()], axis=1)).reshape(zi.shape)
+    np.testing.assert_allclose(zi, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_operator_matches_griddata_on_a_smooth_field():
+    xlin, ylin, op = _operator()
+    ranges, sines = _polarAxes()
+    R, S = np.meshgrid(ranges, sines, indexing="ij")
+    QQ = 1 + R / 8 + 0.5 * S
+
+    zi = (op @ QQ.ravel()).reshape(len(ylin), len(xlin))
+
+    # The polar samples as scattered Cartesian points
+    samples = np.stack([(R * S).ravel(), (R * np.sqrt(1 - S**2)).ravel()], axis=1)
+    x, y, r, s = _pixels(xlin, ylin)
+    expected = interpolate.griddata(samples, QQ.ravel(), (x, y), method="linear")
+    # Compare well inside the fan, where both interpolate
+    inside = (
+        ~np.isnan(expected)
+        & (r < ranges[-1] - 0.5)
+        & (np.abs(s) < sines[-1] - 0.1)
+        & (r > 0.5)
+    )
+    assert inside.sum() > GRID_SIZE * GRID_SIZE / 4
+    np.testing.assert_allclose(zi[inside], expected[inside], rtol=0.01)
+    # Outside the measured fan the grid is 0
+    assert np.all(zi[r > ranges[-1]] == 0)
+
+
+def test_range_doppler_decode():
+    numDopplerBins, numRangeBins = 16, 8
+    heatmap = np.arange(numDopplerBins * numRangeBins, dtype="<u2") * 7
+    payload = np.frombuffer(heatmap.tobytes(), dtype=np.uint8).copy()
+    out = np.zeros((numDopplerBins, numRangeBins), dtype=np.uint16)
+
+    decodeRangeDoppler(payload, 0, out)
+
+    # Range-major payload, Doppler axis fftshifted
+    expected = np.fft.fftshift(heatmap.reshape(numRangeBins, numDopplerBins).T, axes=0)
+    assert np.array_equal(out, expected)
+
+
+def test_azimuth_tlv_fills_the_frame(tmp_path, monkeypatch):
+    import heatmap
+    import only_read
+    from frame import Frame
+
+    monkeypatch.setattr(heatmap, "cache_path", tmp_path)
+    heatmap.azimuthGridOperator.cache_clear()
+    configParameters = {
+        "numRangeBins": NUM_RANGE_BINS,
+        "numVirtualAntennas": 8,
+        "rangeIdxToMeters": RANGE_IDX_TO_METERS,
+    }
+    samples = np.random.default_rng(1).integers(-3000, 3000, (NUM_RANGE_BINS, 16))
+    payload = samples.astype("<i2").tobytes()
+    frame = Frame(NUM_RANGE_BINS, 16, gridSize=GRID_SIZE)
+
+    only_read.processAzimuthHeatMap(payload, 0, frame, configParameters)
+
+    # One angle FFT per range bin, as the demo's visualizer does it
+    q = samples[:, 0::2] + 1j * samples[:, 1::2]
+    QQ = np.array([np.fft.fftshift(np.abs(np.fft.fft(row, NUM_ANGLE_BINS))) for row in q])
+    xlin, ylin, op = buildAzimuthGridOperator(
+        NUM_RANGE_BINS,
+        RANGE_IDX_TO_METERS,
+        only_read.NUM_ANGLE_BINS,
+        only_read.range_width,
+        only_read.range_depth,
+        GRID_SIZE,
+    )
+    expected = (op @ QQ[:, :0:-1].ravel()).reshape(len(ylin), len(xlin))
+    np.testing.assert_allclose(frame.zi, expected, rtol=1e-4, atol=1e-2)
+    assert frame.has(MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP)
+    heatmap.azimuthGridOperator.cache_clear()
@@ -0,0 +1,119 @@
+import socket
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("msgspec")
+
+from frame import Frame
+from netframes import NetFramePublisher, NetFrameSubscriber
+from tlv import (
+    MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP,
+    MMWDEMO_UART_MSG_DETECTED_POINTS,
+    MMWDEMO_UART_MSG_RANGE_PROFILE,
+)
+
+
+def _frame(frameNumber, numRangeBins=64, numDopplerBins=16):
+    frame = Frame(numRangeBins, numDopplerBins)
+    frame.reset(frameNumber, 1000.0 + frameNumber)
+    points = frame.resize_points(3)
+    points["rangeIdx"] = [1, 2, 3]
+    points["x"] = [0.5, -0.5, 1.0]
+    frame.mark(MMWDEMO_UART_MSG_DETECTED_POINTS)
+    frame.rp[:] = np.arange(numRangeBins)
+    frame.mark(MMWDEMO_UART_MSG_RANGE_PROFILE)
+    return frame
+
+
+def _wait(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def publisher():
+    pub = NetFramePublisher(port=0, host="127.0.0.1", sendTimeout=0.5)
+    pub.start()
+    yield pub
+    pub.stop()
+
+
+def test_subscriber_receives_frames(publisher):
+    sub = NetFrameSubscriber("127.0.0.1", publisher.port)
+    try:
+        _wait(lambda: publisher.subscribers)
+        publisher.publish(_frame(7))
+        _wait(lambda: sub.receivedFrames)
+        record, points = sub.latest()
+        assert record["frameNumber"] == 7
+        assert record["timestamp"] == 1007.0
+        assert np.array_equal(record["rp"], np.arange(64))
+        assert points["rangeIdx"].tolist() == [1, 2, 3]
+        assert points["x"].tolist() == [0.5, -0.5, 1.0]
+    finally:
+        sub.close()
+
+
+def test_subscriber_receives_the_azimuth_heatmap(publisher):
+    sub = NetFrameSubscriber("127.0.0.1", publisher.port)
+    try:
+        _wait(lambda: publisher.subscribers)
+        frame = Frame(64, 16, gridSize=10)
+        frame.reset(3)
+        frame.zi[:] = np.arange(100, dtype=np.float32).reshape(10, 10)
+        frame.mark(MMWDEMO_OUTPUT_MSG_AZIMUT_STATIC_HEAT_MAP)
+        publisher.publish(frame)
+        _wait(lambda: sub.receivedFrames)
+        record, _ = sub.latest()
+        assert np.array_equal(record["zi"], frame.zi)
+    finally:
+        sub.close()
+
+
+def _stall(publisher):
+    # Connected but never reading, with as little buffering as the OS allows
+    stalled = socket.socket()
+    stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+    stalled.connect(("127.0.0.1", publisher.port))
+    _wait(lambda: publisher.subscribers)
+    return stalled, publisher.subscribers[0]
+
+
+def _publishUntilBlocked(publisher, subscriber, timeout=5.0):
+    # 256 x 128 heatmap bins make frames of 64 KB, more than the socket
+    # buffers hold after a few frames
+    frame = _frame(0, 256, 128)
+    deadline = time.perf_counter() + timeout
+    while not subscriber.droppedFrames or not subscriber.messages.full():
+        assert time.perf_counter() < deadline
+        frame.frameNumber += 1
+        publisher.publish(frame)
+        time.sleep(0.001)
+
+
+def test_stop_with_a_stalled_subscriber(publisher):
+    stalled, subscriber = _stall(publisher)
+    try:
+        _publishUntilBlocked(publisher, subscriber)
+        start = time.perf_counter()
+        publisher.stop()
+        assert time.perf_counter() - start < 2
+        assert not subscriber.is_alive()
+    finally:
+        stalled.close()
+
+
+def test_stalled_subscriber_is_dropped(publisher):
+    stalled, subscriber = _stall(publisher)
+    try:
+        _publishUntilBlocked(publisher, subscriber)
+        # The blocked send times out and the subscriber is disconnected
+        _wait(lambda: not subscriber.connected)
+        publisher.publish(_frame(0))
+        assert subscriber not in publisher.subscribers
+    finally:
+        stalled.close()
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("msgspec")
+
+import only_read
+from emulator import PacketBuilder
+from frame import Frame
+from radarconfig import loadConfig
+from tlv import (
+    DETECTED_OBJ_DTYPE,
+    MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO,
+    MMWDEMO_UART_MSG_DETECTED_POINTS,
+    OBJ_DESCRIPTOR_DTYPE,
+    POINT_CLOUD_DTYPE,
+    SIDE_INFO_DTYPE,
+)
+
+CONFIG = (
+    Path(__file__).resolve().parent.parent
+    / "src"
+    / "Configurations"
+    / "pointcloud_configuration.cfg"
+)
+
+
+@pytest.fixture
+def configParameters():
+    return loadConfig(CONFIG).parameters()
+
+
+def test_sdk3_points_and_side_info(configParameters):
+    builder = PacketBuilder(configParameters, numObj=5, seed=3, sdk=3)
+    packet = builder.packet(7)
+    # Same seed, so the same payloads in the same order
+    replay = PacketBuilder(configParameters, numObj=5, seed=3, sdk=3)
+    payloads = {tlv_type: replay._payload(tlv_type) for tlv_type in replay.tlvs}
+    cloud = np.frombuffer(
+        payloads[MMWDEMO_UART_MSG_DETECTED_POINTS], dtype=POINT_CLOUD_DTYPE
+    )
+    sideInfo = np.frombuffer(
+        payloads[MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO], dtype=SIDE_INFO_DTYPE
+    )
+
+    frameNumber, frame = only_read.parsePacket(packet, configParameters)
+
+    assert frameNumber == 7
+    assert frame.has(MMWDEMO_UART_MSG_DETECTED_POINTS)
+    assert frame.has(MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO)
+    points = frame.points
+    assert len(points) == 5
+    for name in ("x", "y", "z"):
+        np.testing.assert_array_equal(points[name], cloud[name])
+    np.testing.assert_array_equal(points["doppler"], cloud["velocity"])
+    np.testing.assert_allclose(
+        points["range"],
+        np.sqrt(cloud["x"] ** 2 + cloud["y"] ** 2 + cloud["z"] ** 2),
+        rtol=1e-6,
+    )
+    np.testing.assert_array_equal(points["snr"], sideInfo["snr"])
+    np.testing.assert_array_equal(points["noise"], sideInfo["noise"])
+    assert not points["peakVal"].any()
+
+
+def test_doppler_index_is_folded(configParameters):
+    numDopplerBins = configParameters["numDopplerBins"]
+    half = numDopplerBins // 2
+    dopplerIdx = [0, half - 1, half, numDopplerBins - 1, -3]
+    descriptor = np.zeros((), dtype=OBJ_DESCRIPTOR_DTYPE)
+    descriptor["numObj"] = len(dopplerIdx)
+    descriptor["xyzQFormat"] = 9
+    objects = np.zeros(len(dopplerIdx), dtype=DETECTED_OBJ_DTYPE)
+    objects["dopplerIdx"] = dopplerIdx
+    objects["rangeIdx"] = 10
+    payload = descriptor.tobytes() + objects.tobytes()
+    frame = Frame(configParameters["numRangeBins"], numDopplerBins)
+
+    only_read.processDetectedPoints(payload, 0, frame, configParameters)
+
+    # Bins from numDopplerBins / 2 on are negative velocities
+    folded = [0, half - 1, -half, -1, -3]
+    np.testing.assert_array_equal(frame.points["dopplerIdx"], folded)
+    np.testing.assert_allclose(
+        frame.points["doppler"],
+        np.array(folded) * configParameters["dopplerResolutionMps"],
+    )
@@ -0,0 +1,115 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("msgspec")
+
+from radarconfig import loadConfig, parseConfig
+
+CONFIGURATIONS = sorted(
+    (Path(__file__).resolve().parent.parent / "src" / "Configurations").glob("*.cfg")
+)
+
+
+# parseConfigFile of only_read.py before radarconfig replaced it, trimmed to
+# what it computed. It hard-codes two TX antennas and truncates startFreq and
+# idleTime to integers.
+def referenceParameters(configFileName):
+    for line in open(configFileName):
+        words = line.split(" ")
+        if "profileCfg" in words[0]:
+            startFreq = int(float(words[2]))
+            idleTime = int(words[3])
+            rampEndTime = float(words[5])
+            freqSlopeConst = float(words[8])
+            numAdcSamples = int(words[10])
+            digOutSampleRate = int(words[11])
+        elif "frameCfg" in words[0]:
+            chirpStartIdx = int(words[1])
+            chirpEndIdx = int(words[2])
+            numLoops = int(words[3])
+            framePeriodicity = int(float(words[5]))
+
+    numTxAnt = 2
+    numRangeBins = 1
+    while numAdcSamples > numRangeBins:
+        numRangeBins *= 2
+    numDopplerBins = (chirpEndIdx - chirpStartIdx + 1) * numLoops / numTxAnt
+    chirpTime = (idleTime + rampEndTime) * 1e-6
+    return {
+        "numDopplerBins": numDopplerBins,
+        "numRangeBins": numRangeBins,
+        "rangeResolutionMeters": (3e8 * digOutSampleRate * 1e3)
+        / (2 * freqSlopeConst * 1e12 * numAdcSamples),
+        "rangeIdxToMeters": (3e8 * digOutSampleRate * 1e3)
+        / (2 * freqSlopeConst * 1e12 * numRangeBins),
+        "dopplerResolutionMps": 3e8
+        / (2 * startFreq * 1e9 * chirpTime * numDopplerBins * numTxAnt),
+        "maxRange": (300 * 0.9 * digOutSampleRate) / (2 * freqSlopeConst * 1e3),
+        "maxVelocity": 3e8 / (4 * startFreq * 1e9 * chirpTime * numTxAnt),
+        "framePeriodicity": framePeriodicity,
+    }
+
+
+@pytest.mark.parametrize("configFileName", CONFIGURATIONS, ids=lambda p: p.name)
+def test_parameters_match_the_original_parser(configFileName):
+    parameters = loadConfig(configFileName).parameters()
+    for name, value in referenceParameters(configFileName).items():
+        if name == "framePeriodicity":
+            # The original parser dropped the fraction, e.g. of 33.333 ms
+            assert int(parameters[name]) == value
+        else:
+            assert parameters[name] == value, name
+
+
+def test_shipped_configurations_are_covered():
+    assert {p.name for p in CONFIGURATIONS} >= {
+        "pointcloud_configuration.cfg",
+        "macro_5fps.cfg",
+        "micro_2fps.cfg",
+    }
+
+
+def test_same_content_is_parsed_once(tmp_path):
+    first = tmp_path / "a.cfg"
+    second = tmp_path / "b.cfg"
+    content = CONFIGURATIONS[0].read_bytes()
+    first.write_bytes(content)
+    second.write_bytes(content)
+    assert loadConfig(first) is loadConfig(second)
+
+
+LINES = [
+    "sensorStop",
+    "flushCfg",
+    "profileCfg 0 77 429 7 57.14 0 0 70 1 256 5209 0 0 30",
+    "chirpCfg 0 0 0 0 0 0 0 1",
+    "chirpCfg 1 1 0 0 0 0 0 2",
+    "frameCfg 0 1 16 0 200 1 0",
+    "sensorStart",
+]
+
+
+def test_bad_argument_names_the_line():
+    lines = LINES.copy()
+    lines[5] = "frameCfg 0 1 sixteen 0 200 1 0"
+    with pytest.raises(ValueError, match="line 6: 'frameCfg 0 1 sixteen"):
+        parseConfig(lines)
+
+
+def test_missing_argument_names_the_line():
+    lines = LINES.copy()
+    lines[3] = "chirpCfg 0 0 0"
+    with pytest.raises(ValueError, match="line 4: 'chirpCfg 0 0 0'"):
+        parseConfig(lines)
+
+
+def test_missing_frame_configuration():
+    with pytest.raises(ValueError, match="no frameCfg"):
+        parseConfig(LINES[:5])
+
+
+def test_unknown_command_is_kept():
+    config = parseConfig(LINES[:-1] + ["vendorCfg 1 2", "sensorStart"])
+    assert config.other == {"vendorCfg": ["1", "2"]}
+    assert config.numDopplerBins == 16
@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pytest
+
+from frame import Frame
+from recording import (
+    FORMAT_VERSION,
+    POINT_DTYPE,
+    POINT_FIELDS,
+    Recording,
+    RecordingWriter,
+)
+from tlv import (
+    MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO,
+    MMWDEMO_UART_MSG_DETECTED_POINTS,
+)
+
+CONFIG = {"numRangeBins": 16, "numDopplerBins": 8}
+
+
+def _write(path, sideInfo):
+    writer = RecordingWriter(path, CONFIG)
+    frame = Frame(16, 8)
+    for frameNumber in range(3):
+        frame.reset(frameNumber, 100.0 + frameNumber)
+        points = frame.resize_points(frameNumber + 1)
+        points["rangeIdx"] = np.arange(frameNumber + 1)
+        points["x"] = frameNumber
+        frame.mark(MMWDEMO_UART_MSG_DETECTED_POINTS)
+        if sideInfo:
+            points["snr"] = 10 * frameNumber + np.arange(frameNumber + 1)
+            points["noise"] = 7
+            frame.mark(MMWDEMO_OUTPUT_MSG_DETECTED_POINTS_SIDE_INFO)
+        writer.write(frame)
+    writer.close()
+
+
+def test_points_keep_the_side_info(tmp_path):
+    _write(tmp_path, sideInfo=True)
+    recording = Recording(tmp_path)
+    assert recording.header["version"] == FORMAT_VERSION == 2
+    assert len(recording) == 3
+    record, points = recording[2]
+    assert record["frameNumber"] == 2
+    np.testing.assert_array_equal(points["rangeIdx"], [0, 1, 2])
+    np.testing.assert_array_equal(points["snr"], [20, 21, 22])
+    np.testing.assert_array_equal(points["noise"], [7, 7, 7])
+
+
+# Rewrite a recording as version 1 wrote it, without snr and noise
+def _downgrade(path):
+    with open(path / "header.json") as f:
+        header = json.load(f)
+    stored = np.fromfile(path / "points.bin", dtype=POINT_DTYPE)
+    oldDtype = np.dtype([(name, POINT_DTYPE[name]) for name in POINT_FIELDS])
+    old = np.zeros(len(stored), dtype=oldDtype)
+    for name in POINT_FIELDS:
+        old[name] = stored[name]
+    old.tofile(path / "points.bin")
+    header["version"] = 1
+    header["pointDtype"] = json.loads(json.dumps(oldDtype.descr))
+    with open(path / "header.json", "w") as f:
+        json.dump(header, f)
+
+
+def test_version_1_is_read_without_side_info(tmp_path):
+    _write(tmp_path, sideInfo=True)
+    _downgrade(tmp_path)
+    recording = Recording(tmp_path)
+    assert "snr" not in recording.points.dtype.names
+    record, points = recording[2]
+    assert points.dtype == POINT_DTYPE
+    np.testing.assert_array_equal(points["rangeIdx"], [0, 1, 2])
+    np.testing.assert_array_equal(points["x"], [2, 2, 2])
+    assert not points["snr"].any() and not points["noise"].any()
+
+
+def test_version_1_is_not_appended_to(tmp_path):
+    _write(tmp_path, sideInfo=False)
+    _downgrade(tmp_path)
+    with pytest.raises(ValueError, match="another layout"):
+        RecordingWriter(tmp_path, CONFIG)
+
+
+def test_unknown_version_is_rejected(tmp_path):
+    _write(tmp_path, sideInfo=False)
+    with open(tmp_path / "header.json") as f:
+        header = json.load(f)
+    header["version"] = FORMAT_VERSION + 1
+    with open(tmp_path / "header.json", "w") as f:
+        json.dump(header, f)
+    with pytest.raises(ValueError, match="Unsupported recording version"):
+        Recording(tmp_path)
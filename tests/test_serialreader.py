@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+serial = pytest.importorskip("serial")
+
+from emulator import _Pty
+from serialreader import SerialReaderThread
+
+
+@pytest.fixture
+def device():
+    pty = _Pty()
+    port = serial.Serial(pty.name, timeout=0.1)
+    yield pty, port
+    port.close()
+    pty.close()
+
+
+def _drain(reader, numBytes, timeout=2.0):
+    received = bytearray()
+    deadline = time.perf_counter() + timeout
+    while len(received) < numBytes and time.perf_counter() < deadline:
+        for _, chunk in reader.get_chunks(0.05):
+            received += chunk
+    return bytes(received)
+
+
+def test_reader_passes_bytes_in_order(device):
+    pty, port = device
+    reader = SerialReaderThread(port, framePeriodicity=10, maxPacketLen=1024)
+    reader.start()
+    try:
+        data = os.urandom(20000)
+        for idX in range(0, len(data), 1000):
+            assert pty.write(data[idX : idX + 1000]) == 0
+            time.sleep(0.001)
+        assert _drain(reader, len(data)) == data
+        assert reader.droppedBytes == 0
+    finally:
+        reader.stop()
+
+
+def test_reader_queue_is_bounded_by_bytes(device):
+    pty, port = device
+    reader = SerialReaderThread(port, framePeriodicity=10, maxPacketLen=1, maxBytes=4096)
+    reader.start()
+    try:
+        # Nobody takes the chunks, so everything past maxBytes is dropped
+        for _ in range(8):
+            assert pty.write(bytes(1024)) == 0
+            time.sleep(0.02)
+        deadline = time.perf_counter() + 2
+        while reader.queuedBytes + reader.droppedBytes < 8192:
+            assert time.perf_counter() < deadline
+            time.sleep(0.01)
+        assert reader.queuedBytes <= 4096
+        assert reader.droppedBytes == 8192 - reader.queuedBytes
+        assert len(_drain(reader, reader.queuedBytes)) <= 4096
+        assert reader.queuedBytes == 0
+    finally:
+        reader.stop()
+
+
+def test_default_bound_covers_the_buffered_time():
+    class Port:
+        timeout = None
+
+    # 50 ms frames for 2 s: 40 packets
+    reader = SerialReaderThread(Port(), 50, maxPacketLen=1000, bufferSeconds=2.0)
+    assert reader.maxBytes == 40 * 1000